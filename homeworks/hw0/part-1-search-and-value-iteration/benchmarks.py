@@ -0,0 +1,413 @@
+# benchmarks.py
+# -------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Micro-benchmarks for the data structures and engines used by the search and
+pacman code.  Run a benchmark by name, e.g.
+
+> python benchmarks.py priorityQueue
+> python benchmarks.py priorityQueue --sizes 1000,10000
+> python benchmarks.py environment --layouts smallClassic --sizes 1,64
+> python benchmarks.py observations --layouts mediumClassic --games 10
+> python benchmarks.py searchScaling --sizes 100,500,2000 --fns cucs,castar --output scaling.csv
+> python benchmarks.py jumpPoint --fns castar,jps,bidirectional
+"""
+
+import contextlib, csv, heapq, io, random, sys, time, tracemalloc
+import util
+
+class LinearScanPriorityQueue:
+    """
+    The original util.PriorityQueue, whose update does a linear scan followed
+    by a full heapify.  Kept here only as a baseline for comparison.
+    """
+    def  __init__(self):
+        self.heap = []
+        self.count = 0
+
+    def push(self, item, priority):
+        entry = (priority, self.count, item)
+        heapq.heappush(self.heap, entry)
+        self.count += 1
+
+    def pop(self):
+        (_, _, item) = heapq.heappop(self.heap)
+        return item
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def update(self, item, priority):
+        for index, (p, c, i) in enumerate(self.heap):
+            if i == item:
+                if p <= priority:
+                    break
+                del self.heap[index]
+                self.heap.append((priority, c, item))
+                heapq.heapify(self.heap)
+                break
+        else:
+            self.push(item, priority)
+
+def timeQueue(queueClass, size, numUpdates, seed=0):
+    """
+    Fills a queue with 'size' items, applies 'numUpdates' decrease-key
+    operations, then drains it.  Returns (fillSeconds, updateSeconds, popSeconds).
+    """
+    rand = random.Random(seed)
+    priorities = [rand.randrange(size * 4) for i in range(size)]
+    updates = [(rand.randrange(size), rand.randrange(size * 4)) for i in range(numUpdates)]
+
+    queue = queueClass()
+    start = time.perf_counter()
+    for item, priority in enumerate(priorities):
+        queue.push(item, priority)
+    filled = time.perf_counter()
+    for item, priority in updates:
+        queue.update(item, priority)
+    updated = time.perf_counter()
+    while not queue.isEmpty():
+        queue.pop()
+    drained = time.perf_counter()
+    return filled - start, updated - filled, drained - updated
+
+def timeDuplicatePushes(queueClass, size, seed=0):
+    """
+    Pushes 'size' entries over size / 4 distinct items, as searches do when
+    they push a state again for every cheaper path, then drains the queue.
+    Returns (pushSeconds, popSeconds).
+    """
+    rand = random.Random(seed)
+    pushes = [(rand.randrange(max(1, size // 4)), rand.randrange(size * 4)) for i in range(size)]
+    queue = queueClass()
+    start = time.perf_counter()
+    for item, priority in pushes:
+        queue.push(item, priority)
+    pushed = time.perf_counter()
+    while not queue.isEmpty():
+        queue.pop()
+    return pushed - start, time.perf_counter() - pushed
+
+def timeWavefront(queueClass, size):
+    """
+    Pops the cheapest item and pushes two successors one step dearer until
+    'size' items were pushed, then drains the queue: the frontier of a
+    uniform cost search with unit step costs.  Returns the seconds taken.
+    """
+    queue = queueClass()
+    queue.push(0, 0)
+    pushed = 1
+    start = time.perf_counter()
+    while pushed < size:
+        cost = queue.pop()
+        queue.push(cost + 1, cost + 1)
+        queue.push(cost + 1, cost + 1)
+        pushed += 2
+    while not queue.isEmpty():
+        queue.pop()
+    return time.perf_counter() - start
+
+def priorityQueueBenchmark(sizes=(1000, 10000, 100000, 1000000), numUpdates=1000):
+    """
+    Compares util.PriorityQueue and util.BucketQueue against the linear-scan
+    baseline on frontier sizes given by 'sizes': for decrease-key updates,
+    for repeated pushes of the same items and for unit step costs.
+    """
+    print('%-24s %9s %10s %12s %10s %14s' % ('queue', 'size', 'fill (s)', 'update (s)', 'pop (s)', 'us / update'))
+    for size in sizes:
+        for name, queueClass in [('LinearScanPriorityQueue', LinearScanPriorityQueue),
+                                 ('util.PriorityQueue', util.PriorityQueue),
+                                 ('util.BucketQueue', util.BucketQueue)]:
+            fill, update, pop = timeQueue(queueClass, size, numUpdates)
+            print('%-24s %9d %10.3f %12.3f %10.3f %14.2f' % (name, size, fill, update, pop, 1e6 * update / numUpdates))
+
+    print()
+    print('Duplicate pushes (each item pushed about 4 times)')
+    print('%-24s %9s %10s %10s' % ('queue', 'pushes', 'push (s)', 'pop (s)'))
+    for size in sizes:
+        for name, queueClass in [('LinearScanPriorityQueue', LinearScanPriorityQueue),
+                                 ('util.PriorityQueue', util.PriorityQueue),
+                                 ('util.BucketQueue', util.BucketQueue)]:
+            push, pop = timeDuplicatePushes(queueClass, size)
+            print('%-24s %9d %10.3f %10.3f' % (name, size, push, pop))
+
+    print()
+    print('Unit step costs (pop one item, push two one step dearer)')
+    print('%-24s %9s %10s' % ('queue', 'pushes', 'time (s)'))
+    for size in sizes:
+        for name, queueClass in [('LinearScanPriorityQueue', LinearScanPriorityQueue),
+                                 ('util.PriorityQueue', util.PriorityQueue),
+                                 ('util.BucketQueue', util.BucketQueue)]:
+            print('%-24s %9d %10.3f' % (name, size, timeWavefront(queueClass, size)))
+
+def timeEnvironment(env, numSteps, seed=0):
+    """
+    Takes numSteps random pacman actions in env and returns the elapsed
+    seconds.  Vector environments take one action per game for each step.
+    """
+    import pacmanEnvironment
+    rand = random.Random(seed)
+    vector = isinstance(env, pacmanEnvironment.VectorPacmanEnvironment)
+    start = time.perf_counter()
+    for i in range(numSteps):
+        legal = env.getPossibleActions(env.getCurrentState())
+        if vector:
+            env.doAction([rand.choice(actions) for actions in legal])
+        else:
+            env.doAction(rand.choice(legal))
+            if env.isTerminal(): env.reset()
+    return time.perf_counter() - start
+
+def environmentBenchmark(layoutNames=('smallClassic', 'mediumClassic'), batchSizes=(1, 16, 256), numSteps=2000):
+    """
+    Measures pacman steps per second (one step is a pacman move and a move of
+    every ghost) for PacmanEnvironment and for VectorPacmanEnvironment with
+    each of the given batch sizes.
+    """
+    import layout, pacmanEnvironment
+    print('%-16s %-26s %7s %10s %12s' % ('layout', 'environment', 'games', 'time (s)', 'steps / s'))
+    for name in layoutNames:
+        board = layout.getLayout(name)
+        seconds = timeEnvironment(pacmanEnvironment.PacmanEnvironment(board), numSteps)
+        print('%-16s %-26s %7d %10.3f %12.0f' % (name, 'PacmanEnvironment', 1, seconds, numSteps / seconds))
+        for numGames in batchSizes:
+            env = pacmanEnvironment.VectorPacmanEnvironment(board, numGames, seed=0)
+            calls = max(1, numSteps // numGames)
+            seconds = timeEnvironment(env, calls)
+            print('%-16s %-26s %7d %10.3f %12.0f' % (name, 'VectorPacmanEnvironment', numGames, seconds, calls * numGames / seconds))
+
+def observationBenchmark(layoutNames=('mediumClassic',), numGames=5):
+    """
+    Plays the same seeded games of GreedyAgent against DirectionalGhosts
+    with deep-copied observations and with read-only observation views
+    (Game.observationViews), and reports moves per second for each.
+    """
+    import layout, pacman, pacmanAgents, ghostAgents, textDisplay
+    print('%-16s %-18s %7s %10s %12s' % ('layout', 'observations', 'moves', 'time (s)', 'moves / s'))
+    for name in layoutNames:
+        board = layout.getLayout(name)
+        scores = {}
+        for observationViews in [False, True]:
+            moves, seconds, scores[observationViews] = 0, 0.0, []
+            for i in range(numGames):
+                random.seed('observations-%d' % i)
+                ghosts = [ghostAgents.DirectionalGhost(g + 1) for g in range(board.getNumGhosts())]
+                game = pacman.ClassicGameRules().newGame(board, pacmanAgents.GreedyAgent(), ghosts, textDisplay.NullGraphics(),
+                                                         True, observationViews=observationViews)
+                start = time.perf_counter()
+                game.run()
+                seconds += time.perf_counter() - start
+                moves += len(game.moveHistory)
+                scores[observationViews].append(game.state.getScore())
+            label = ['deepCopy', 'observationView'][observationViews]
+            print('%-16s %-18s %7d %10.3f %12.0f' % (name, label, moves, seconds, moves / seconds))
+        if scores[False] != scores[True]:
+            raise Exception('Observation views changed the outcome of the games on ' + name)
+
+def runSearchAgent(board, fn, heuristic='manhattanHeuristic', trackMemory=False):
+    """
+    Plans a path on board with SearchAgent(fn) on a PositionSearchProblem to
+    (1,1) and returns a dictionary of measurements.  Search functions that
+    are not implemented yet, or crash, are reported in 'error'; cost and
+    expansions per second are left blank unless the path reaches the goal.
+    """
+    import pacman, searchAgents
+    from game import Actions
+    state = pacman.GameState()
+    state.initialize(board, 0)
+    result = {'fn': fn, 'solved': False, 'cost': '', 'expanded': '', 'seconds': '',
+              'expandedPerSecond': '', 'peakMemoryMB': '', 'error': ''}
+    problems = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = searchAgents.SearchAgent(fn=fn, prob='PositionSearchProblem', heuristic=heuristic)
+        searchType = agent.searchType
+        agent.searchType = lambda state: problems.append(searchType(state)) or problems[-1]
+        if trackMemory: tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            agent.registerInitialState(state)
+        except SystemExit: # util.raiseNotDefined
+            result['error'] = 'not implemented'
+        except Exception as e:
+            result['error'] = '%s: %s' % (type(e).__name__, e)
+        seconds = time.perf_counter() - start
+        if trackMemory:
+            result['peakMemoryMB'] = '%.2f' % (tracemalloc.get_traced_memory()[1] / 2.0 ** 20)
+            tracemalloc.stop()
+    if result['error'] or not problems: return result
+
+    problem = problems[0]
+    position = problem.getStartState()
+    for action in agent.actions:
+        position = Actions.getSuccessor(position, action)
+    result['solved'] = position == problem.goal
+    result['expanded'] = problem._expanded
+    result['seconds'] = '%.4f' % seconds
+    if result['solved']:
+        result['cost'] = problem.getCostOfActions(agent.actions)
+        result['expandedPerSecond'] = '%.0f' % (problem._expanded / seconds if seconds > 0 else 0)
+    return result
+
+def searchScalingBenchmark(sizes=(50, 100, 200, 500, 1000), fns=('bibfs', 'jps', 'cucs', 'castar'),
+                           kinds=('perfect', 'braided', 'rooms'), output='searchScaling.csv', trackMemory=True):
+    """
+    Runs each search function through SearchAgent on generated square mazes
+    (see mazeGenerator.py) of each kind and size, and writes nodes expanded,
+    wall time, expansions per second and peak memory to a CSV file.
+
+    Wall time comes from an untraced run; peak memory from a second run under
+    tracemalloc, which is skipped if trackMemory is False.  Raises an
+    exception if none of the search functions is implemented.
+    """
+    import mazeGenerator
+    columns = ['kind', 'size', 'cells', 'fn', 'solved', 'cost', 'expanded', 'seconds', 'expandedPerSecond', 'peakMemoryMB', 'error']
+    f = open(output, 'w', newline='')
+    try:
+        writer = csv.DictWriter(f, columns)
+        writer.writeheader()
+        print('%-8s %6s %-6s %6s %7s %10s %10s %12s %10s  %s' % ('kind', 'size', 'fn', 'solved', 'cost', 'expanded', 'time (s)',
+                                                              'expanded / s', 'peak (MB)', 'error'))
+        for kind in kinds:
+            for size in sizes:
+                board = mazeGenerator.generateLayout(kind, size, size)
+                rows = []
+                for fn in fns:
+                    row = runSearchAgent(board, fn)
+                    if trackMemory and not row['error']:
+                        row['peakMemoryMB'] = runSearchAgent(board, fn, trackMemory=True)['peakMemoryMB']
+                    row.update({'kind': kind, 'size': size, 'cells': len(board.walls.asList(False))})
+                    writer.writerow(row)
+                    f.flush()
+                    rows.append(row)
+                    print('%-8s %6d %-6s %6s %7s %10s %10s %12s %10s  %s' % (kind, size, fn, row['solved'], row['cost'], row['expanded'],
+                                                                             row['seconds'], row['expandedPerSecond'],
+                                                                             row['peakMemoryMB'], row['error']))
+                if all(row['error'] == 'not implemented' for row in rows):
+                    raise Exception('None of the search functions %s is implemented' % ', '.join(fns))
+    finally:
+        f.close()
+
+def jumpPointBenchmark(layoutNames=('openMaze', 'openSearch'), fns=('castar', 'jps'), roomSizes=(200, 1000)):
+    """
+    Compares search functions (by default the reference A* with
+    manhattanHeuristic and Jump Point Search) on open layouts and on
+    generated boards of large rooms with the given sizes: path cost, nodes
+    expanded and time, and for every function after the first, its speedup
+    and the fraction of nodes it expands relative to the first.
+    """
+    import layout, mazeGenerator
+    boards = [(name, layout.getLayout(name)) for name in layoutNames]
+    boards += [('rooms%d' % size, mazeGenerator.generateLayout('rooms', size, size, roomSize=max(3, size // 5))) for size in roomSizes]
+    print('%-12s %-13s %7s %10s %10s %12s %8s %10s  %s' % ('layout', 'fn', 'cost', 'expanded', 'time (s)', 'expanded / s',
+                                                          'speedup', 'expanded %', 'error'))
+    for name, board in boards:
+        baseline = None
+        for fn in fns:
+            row = runSearchAgent(board, fn)
+            speedup = share = ''
+            if baseline is None:
+                baseline = row
+            elif row['solved'] and baseline['solved']:
+                speedup = '%.2f' % (float(baseline['seconds']) / max(float(row['seconds']), 1e-9))
+                share = '%.2f' % (100.0 * row['expanded'] / max(baseline['expanded'], 1))
+            print('%-12s %-13s %7s %10s %10s %12s %8s %10s  %s' % (name, fn, row['cost'], row['expanded'], row['seconds'],
+                                                                  row['expandedPerSecond'], speedup, share, row['error']))
+
+def hdaScalingBenchmark(layoutNames=('trickySearch',), workerCounts=(1, 2, 4), generatedSizes=(15, 21)):
+    """
+    Times hash-distributed A* (search.hda) with each number of workers on
+    the FoodSearchProblem of some layouts and of generated braided mazes
+    with scattered food, against the serial search.cucs: path cost, nodes
+    expanded (HDA* expands some nodes more than once) and speedup.  The
+    heuristic is nullHeuristic, so only the parallel machinery is measured.
+    """
+    import layout, mazeGenerator, pacman, search, searchAgents
+    boards = [(name, layout.getLayout(name)) for name in layoutNames]
+    boards += [('braided%d' % size, mazeGenerator.generateLayout('braided', size, size, foodDensity=0.06, seed=1)) for size in generatedSizes]
+    print('%-14s %-8s %7s %10s %10s %8s' % ('layout', 'fn', 'cost', 'expanded', 'time (s)', 'speedup'))
+    for name, board in boards:
+        state = pacman.GameState()
+        state.initialize(board, 0)
+        runs = [('cucs', search.cucs)] + [('hda/%d' % n, lambda problem, n=n: search.hda(problem, workers=n)) for n in workerCounts]
+        serialSeconds = None
+        for fn, searchFunction in runs:
+            problem = searchAgents.FoodSearchProblem(state)
+            start = time.perf_counter()
+            actions = searchFunction(problem)
+            seconds = time.perf_counter() - start
+            if serialSeconds is None: serialSeconds = seconds
+            print('%-14s %-8s %7s %10d %10.4f %8.2f' % (name, fn, problem.getCostOfActions(actions), problem._expanded,
+                                                       seconds, serialSeconds / seconds if seconds > 0 else 0))
+
+BENCHMARKS = {
+    'priorityQueue': priorityQueueBenchmark,
+    'environment': environmentBenchmark,
+    'observations': observationBenchmark,
+    'searchScaling': searchScalingBenchmark,
+    'jumpPoint': jumpPointBenchmark,
+    'hdaScaling': hdaScalingBenchmark,
+}
+
+def listOption(value, default, convert=str):
+    "Splits a comma separated option, or returns default if it was not given"
+    if value is None: return default
+    return [convert(v) for v in value.split(',')]
+
+def readCommand(argv):
+    from optparse import OptionParser
+    usageStr = """
+    USAGE:      python benchmarks.py <benchmark> <options>
+    BENCHMARKS: %s
+    """ % ', '.join(sorted(BENCHMARKS))
+    parser = OptionParser(usageStr)
+    parser.add_option('--sizes', dest='sizes', default=None,
+                      help='Comma separated problem sizes, batch sizes for environment or worker counts for hdaScaling [Default: depends on the benchmark]')
+    parser.add_option('--updates', dest='updates', type='int', default=1000,
+                      help='Number of decrease-key operations per run [Default: %default]')
+    parser.add_option('--layouts', dest='layouts', default=None,
+                      help='Comma separated layouts to run on [Default: depends on the benchmark]')
+    parser.add_option('--steps', dest='steps', type='int', default=20000,
+                      help='Number of environment steps per run [Default: %default]')
+    parser.add_option('--games', dest='games', type='int', default=5,
+                      help='Number of games to play per run [Default: %default]')
+    parser.add_option('--fns', dest='fns', default=None,
+                      help='Comma separated search functions [Default: depends on the benchmark]')
+    parser.add_option('--kinds', dest='kinds', default=None,
+                      help='Comma separated maze kinds for searchScaling [Default: perfect,braided,rooms]')
+    parser.add_option('--output', dest='output', default='searchScaling.csv',
+                      help='CSV file written by searchScaling [Default: %default]')
+    parser.add_option('--noMemory', dest='noMemory', action='store_true', default=False,
+                      help='Skip the tracemalloc runs that measure peak memory')
+    options, args = parser.parse_args(argv)
+    if len(args) != 1 or args[0] not in BENCHMARKS:
+        parser.error('Choose one benchmark from: ' + ', '.join(sorted(BENCHMARKS)))
+    return args[0], options
+
+if __name__ == '__main__':
+    name, options = readCommand(sys.argv[1:])
+    sizes = lambda default: listOption(options.sizes, default, lambda s: int(float(s)))
+    if name == 'priorityQueue':
+        priorityQueueBenchmark(sizes((1000, 10000, 100000, 1000000)), options.updates)
+    elif name == 'environment':
+        environmentBenchmark(listOption(options.layouts, ('smallClassic', 'mediumClassic')), sizes((1, 16, 256)), options.steps)
+    elif name == 'observations':
+        observationBenchmark(listOption(options.layouts, ('mediumClassic',)), options.games)
+    elif name == 'searchScaling':
+        searchScalingBenchmark(sizes((50, 100, 200, 500, 1000)), listOption(options.fns, ('bibfs', 'jps', 'cucs', 'castar')),
+                               listOption(options.kinds, ('perfect', 'braided', 'rooms')), options.output, not options.noMemory)
+    elif name == 'jumpPoint':
+        jumpPointBenchmark(listOption(options.layouts, ('openMaze', 'openSearch')), listOption(options.fns, ('castar', 'jps')),
+                           sizes((200, 1000)))
+    elif name == 'hdaScaling':
+        hdaScalingBenchmark(listOption(options.layouts, ('trickySearch',)), sizes((1, 2, 4)))
@@ -0,0 +1,245 @@
+# distanceCalculator.py
+# ---------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+This file contains a MazeDistanceOracle, which computes the maze distance
+between every pair of open cells of a layout once and answers distance
+queries with a table lookup afterwards.
+
+Oracles are shared: getOracle(layout) returns the same oracle for every
+Layout built from the same text, so search problems, heuristics and ghost
+agents all pay for the precomputation at most once per process.  Tables
+grow with the square of the number of open cells, so only the
+ORACLE_CACHE_SIZE most recently used oracles are kept by layout text, and
+boards with more than MAX_ORACLE_CELLS open cells get a MazeDistanceRows,
+which runs one breadth-first search per queried source instead.
+
+> oracle = distanceCalculator.getOracle(gameState.data.layout)
+> oracle.distance((1, 1), (5, 3))
+"""
+
+from array import array
+from collections import deque, OrderedDict
+import hashlib
+import mmap
+import os
+
+UNREACHABLE = float('inf')
+
+ORACLE_CACHE_SIZE = 8 # Oracles kept in memory by layout text, besides those held by Layouts
+_ORACLE_CACHE = OrderedDict() # layout text hash -> MazeDistanceOracle, least recently used first
+MAX_ORACLE_CELLS = 2500 # Open cells above which getOracle skips the all-pairs table (12.5 MB)
+ROW_CACHE_SIZE = 64 # Breadth-first search rows kept by a MazeDistanceRows
+
+class MazeDistanceOracle:
+    """
+    All-pairs maze distances for the open cells of a layout.
+
+    Open cells are numbered column by column.  Distances are stored in a flat
+    array of unsigned shorts ('H'), or unsigned ints for boards with 65535 or
+    more open cells, where entry (i * numCells + j) is the distance between
+    cells i and j.
+    """
+
+    def __init__(self, walls, table=None):
+        """
+          walls: A Grid (see game.py) of wall indicator variables
+          table: A precomputed distance array to reuse instead of running BFS
+        """
+        self._indexCells(walls)
+        if table is None:
+            table = self._computeTable()
+        if len(table) != self.numCells * self.numCells:
+            raise ValueError('Distance table does not match the layout')
+        self.table = table
+
+    def _indexCells(self, walls):
+        self.width, self.height = walls.width, walls.height
+        self.positions = [(x, y) for x in range(self.width) for y in range(self.height) if not walls[x][y]]
+        self.cellIndex = dict((pos, i) for i, pos in enumerate(self.positions))
+        self.numCells = len(self.positions)
+        self.typecode = 'H' if self.numCells < 0xFFFF else 'I'
+        self.unreachable = 0xFFFF if self.typecode == 'H' else 0xFFFFFFFF
+
+    def _neighborIds(self):
+        cellIndex = self.cellIndex
+        neighbors = []
+        for x, y in self.positions:
+            ids = []
+            for nx, ny in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+                i = cellIndex.get((nx, ny))
+                if i is not None: ids.append(i)
+            neighbors.append(ids)
+        return neighbors
+
+    def _searchFrom(self, source, neighbors):
+        "Returns the distances from cell source to every cell, as an array."
+        unreachable = self.unreachable
+        row = [unreachable] * self.numCells
+        row[source] = 0
+        frontier = deque([source])
+        while frontier:
+            cell = frontier.popleft()
+            nextDistance = row[cell] + 1
+            for neighbor in neighbors[cell]:
+                if row[neighbor] == unreachable:
+                    row[neighbor] = nextDistance
+                    frontier.append(neighbor)
+        return array(self.typecode, row)
+
+    def _computeTable(self):
+        "Runs a breadth-first search from every open cell."
+        n = self.numCells
+        neighbors = self._neighborIds()
+        table = array(self.typecode, [self.unreachable]) * (n * n)
+        for source in range(n):
+            table[source * n:(source + 1) * n] = self._searchFrom(source, neighbors)
+        return table
+
+    def _cellId(self, pos):
+        x, y = pos
+        return self.cellIndex[(int(x + 0.5), int(y + 0.5))]
+
+    def distance(self, pos1, pos2):
+        """
+        Returns the maze distance between two open positions, or UNREACHABLE
+        if no path connects them.  Non-integer positions (e.g. scared ghosts
+        between cells) are snapped to the nearest cell.  Raises KeyError if a
+        position is a wall or lies outside the board.
+        """
+        d = self.table[self._cellId(pos1) * self.numCells + self._cellId(pos2)]
+        if d == self.unreachable: return UNREACHABLE
+        return d
+
+    def distancesFrom(self, pos):
+        """
+        Returns a dictionary mapping every open position to its maze distance
+        from pos.  Unreachable positions are left out.
+        """
+        n = self.numCells
+        start = self._cellId(pos) * n
+        row = self.table[start:start + n]
+        return dict((p, d) for p, d in zip(self.positions, row) if d != self.unreachable)
+
+    def save(self, path):
+        "Writes the distance table to disk (see loadOracle)."
+        f = open(path, 'wb')
+        try: f.write(self.table)
+        finally: f.close()
+
+    def __getstate__(self):
+        # Tables read by loadOracle are views of a memory map, which cannot be
+        # pickled; copy them into an array instead
+        state = self.__dict__.copy()
+        if isinstance(state.get('table'), memoryview):
+            state['table'] = array(self.typecode, state['table'].tobytes())
+        return state
+
+class MazeDistanceRows(MazeDistanceOracle):
+    """
+    Maze distances for boards too big for an all-pairs table.  Each query runs
+    a breadth-first search from one of its endpoints, unless a row for either
+    endpoint is among the rowCacheSize most recently used.
+    """
+
+    def __init__(self, walls, rowCacheSize=ROW_CACHE_SIZE):
+        self._indexCells(walls)
+        self.neighbors = self._neighborIds()
+        self.rowCacheSize = rowCacheSize
+        self.rows = OrderedDict() # cell id -> distance array, least recently used first
+
+    def _row(self, source):
+        row = self.rows.get(source)
+        if row is None:
+            row = self.rows[source] = self._searchFrom(source, self.neighbors)
+            while len(self.rows) > self.rowCacheSize:
+                self.rows.popitem(last=False)
+        else:
+            self.rows.move_to_end(source)
+        return row
+
+    def distance(self, pos1, pos2):
+        source, target = self._cellId(pos1), self._cellId(pos2)
+        if target in self.rows and source not in self.rows:
+            source, target = target, source # Maze distances are symmetric
+        d = self._row(source)[target]
+        if d == self.unreachable: return UNREACHABLE
+        return d
+
+    def distancesFrom(self, pos):
+        row = self._row(self._cellId(pos))
+        return dict((p, d) for p, d in zip(self.positions, row) if d != self.unreachable)
+
+    def save(self, path):
+        raise Exception('MazeDistanceRows keeps no all-pairs table to save')
+
+def layoutKey(layout):
+    "A hash of the layout text, shared by every Layout parsed from that text."
+    return hashlib.sha1('\n'.join(layout.layoutText).encode()).hexdigest()
+
+def loadOracle(walls, path):
+    """
+    Reads a table written by MazeDistanceOracle.save.  Returns None if the file
+    is missing or does not match the walls.
+
+    The file is memory-mapped rather than read, so only the rows that are
+    queried are paged in, and processes loading the same table share it.
+    """
+    if not os.path.exists(path): return None
+    # Index the cells without running BFS, then map the table
+    oracle = MazeDistanceOracle.__new__(MazeDistanceOracle)
+    oracle._indexCells(walls)
+    table = array(oracle.typecode)
+    size = oracle.numCells * oracle.numCells * table.itemsize
+    f = open(path, 'rb')
+    try:
+        if os.fstat(f.fileno()).st_size != size: return None
+        if size:
+            table = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast(oracle.typecode)
+    finally:
+        f.close()
+    oracle.table = table
+    return oracle
+
+def getOracle(layout, cacheDir=None, cache=True):
+    """
+    Returns the MazeDistanceOracle for a layout, building it on first use.
+
+    Oracles are cached on the Layout object and in-process by layout text
+    hash, in a least recently used cache of ORACLE_CACHE_SIZE entries; with
+    cache=False (e.g. for one-off generated boards) the oracle is only kept
+    on the Layout.  If cacheDir is given, tables are also persisted there
+    and reused by later processes.  Layouts with more than MAX_ORACLE_CELLS
+    open cells get a MazeDistanceRows, which is never persisted.
+    """
+    oracle = getattr(layout, 'distanceOracle', None)
+    if oracle is not None: return oracle
+    key = layoutKey(layout)
+    oracle = _ORACLE_CACHE.get(key)
+    if oracle is not None: _ORACLE_CACHE.move_to_end(key)
+    if oracle is None and layout.walls.count(False) > MAX_ORACLE_CELLS:
+        oracle = MazeDistanceRows(layout.walls)
+    if oracle is None and cacheDir is not None:
+        oracle = loadOracle(layout.walls, os.path.join(cacheDir, key + '.dist'))
+    if oracle is None:
+        oracle = MazeDistanceOracle(layout.walls)
+        if cacheDir is not None:
+            if not os.path.isdir(cacheDir): os.makedirs(cacheDir)
+            oracle.save(os.path.join(cacheDir, key + '.dist'))
+    if cache:
+        _ORACLE_CACHE[key] = oracle
+        while len(_ORACLE_CACHE) > ORACLE_CACHE_SIZE:
+            _ORACLE_CACHE.popitem(last=False)
+    layout.distanceOracle = oracle
+    return oracle
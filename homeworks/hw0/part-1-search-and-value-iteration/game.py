@@ -22,8 +22,10 @@
 
 from util import *
 import time, os
+import hashlib
 import traceback
 import sys
+import random
 
 #######################
 # Parts worth reading #
@@ -238,7 +240,7 @@ class Grid:
             bit = self.CELLS_PER_INT - (i % self.CELLS_PER_INT) - 1
             x, y = self._cellIndexToPosition(i)
             if self[x][y]:
-                currentInt += 2 ** bit
+                currentInt |= 1 << bit
             if (i + 1) % self.CELLS_PER_INT == 0:
                 bits.append(currentInt)
                 currentInt = 0
@@ -266,14 +268,292 @@ class Grid:
         bools = []
         if packed < 0: raise ValueError("must be a positive integer")
         for i in range(size):
-            n = 2 ** (self.CELLS_PER_INT - i - 1)
-            if packed >= n:
-                bools.append(True)
-                packed -= n
-            else:
-                bools.append(False)
+            bools.append((packed >> (self.CELLS_PER_INT - i - 1)) & 1 == 1)
         return bools
 
+class BitGrid:
+    """
+    A 2-dimensional array of booleans packed into the bits of one Python int,
+    with the same grid[x][y] interface as Grid.  Cell (x,y) is bit
+    x * height + y, the column-major order used by Grid.packBits.
+
+    Copies share nothing (ints are immutable) and cost one object, hashing is
+    an int hash, count() is a popcount and asList() only visits set bits.
+    Layouts use a BitGrid for food, which is copied and hashed on every move.
+    """
+    def __init__(self, width, height, initialValue=False, bitRepresentation=None):
+        if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        self.bits = (1 << (width * height)) - 1 if initialValue else 0
+        if bitRepresentation:
+            self._unpackBits(bitRepresentation)
+
+    def _column(self, x):
+        if not 0 <= x < self.width:
+            if -self.width <= x < 0: x += self.width
+            else: raise IndexError('grid index out of range')
+        return x
+
+    def __getitem__(self, x):
+        return _BitGridColumn(self, self._column(x))
+
+    def __setitem__(self, x, column):
+        self[x].assign(column)
+
+    def __iter__(self):
+        for x in range(self.width):
+            yield _BitGridColumn(self, x)
+
+    def __len__(self):
+        return self.width
+
+    @property
+    def data(self):
+        "A list-of-lists snapshot of the grid, as stored by Grid"
+        return [list(column) for column in self]
+
+    def __str__(self):
+        out = [[str(self[x][y])[0] for x in range(self.width)] for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __eq__(self, other):
+        if other == None: return False
+        if isinstance(other, BitGrid):
+            return self.bits == other.bits and self.width == other.width and self.height == other.height
+        return self.data == getattr(other, 'data', None)
+
+    def __hash__(self):
+        # Equal to Grid.__hash__ for the same contents
+        return hash(self.bits)
+
+    def copy(self):
+        g = BitGrid(self.width, self.height)
+        g.bits = self.bits
+        return g
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def count(self, item =True ):
+        n = self.bits.bit_count()
+        if item: return n
+        return self.width * self.height - n
+
+    def asList(self, key = True):
+        bits = self.bits if key else ~self.bits & ((1 << (self.width * self.height)) - 1)
+        height = self.height
+        list = []
+        while bits:
+            low = bits & -bits
+            i = low.bit_length() - 1
+            list.append((i // height, i % height))
+            bits ^= low
+        return list
+
+    def packBits(self):
+        """
+        Returns the same (width, height, bitPackedInts...) representation as
+        Grid.packBits
+        """
+        n = self.width * self.height
+        chunkMask = (1 << self.CELLS_PER_INT) - 1
+        bits = [self.width, self.height]
+        for start in range(0, n // self.CELLS_PER_INT * self.CELLS_PER_INT + 1, self.CELLS_PER_INT):
+            chunk = (self.bits >> start) & chunkMask
+            if start + self.CELLS_PER_INT > n:
+                chunk &= (1 << (n - start)) - 1
+            # Grid.packBits stores the first cell of a chunk in its highest bit
+            bits.append(int(format(chunk, '0%db' % self.CELLS_PER_INT)[::-1], 2))
+        return tuple(bits)
+
+    def _unpackBits(self, bits):
+        n = self.width * self.height
+        value = 0
+        for k, packed in enumerate(bits):
+            if packed < 0: raise ValueError("must be a positive integer")
+            value |= int(format(packed, '0%db' % self.CELLS_PER_INT)[::-1], 2) << (k * self.CELLS_PER_INT)
+        self.bits = value & ((1 << n) - 1)
+
+class _BitGridColumn:
+    "Supports grid[x][y] reads and writes on a BitGrid"
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def _bit(self, y):
+        height = self.grid.height
+        if not 0 <= y < height:
+            if -height <= y < 0: y += height
+            else: raise IndexError('grid index out of range')
+        return self.x * height + y
+
+    def __getitem__(self, y):
+        return (self.grid.bits >> self._bit(y)) & 1 == 1
+
+    def __setitem__(self, y, value):
+        if value not in [False, True]: raise Exception('Grids can only contain booleans')
+        bit = 1 << self._bit(y)
+        if value: self.grid.bits |= bit
+        else: self.grid.bits &= ~bit
+
+    def __iter__(self):
+        for y in range(self.grid.height):
+            yield self[y]
+
+    def __len__(self):
+        return self.grid.height
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def assign(self, values):
+        values = list(values)
+        if len(values) != self.grid.height: raise ValueError('column has the wrong height')
+        for y, value in enumerate(values):
+            self[y] = value
+
+class CellIndex:
+    """
+    Numbers the open (non-wall) cells of a board column by column, so that a
+    set of cells can be stored as the bits of one integer.
+
+    key identifies the numbering: two CellIndexes with the same key number
+    the same cells.  Unpickling returns one shared CellIndex per key and
+    process, so states sent between processes do not each bring a copy.
+    """
+    def __init__(self, walls):
+        self.width = walls.width
+        self.height = walls.height
+        self.positions = [(x, y) for x in range(self.width) for y in range(self.height) if not walls[x][y]]
+        self._indexPositions()
+
+    def _indexPositions(self):
+        self.index = dict((pos, i) for i, pos in enumerate(self.positions))
+        self.key = hash((self.width, self.height, tuple(self.positions)))
+
+    def __reduce__(self):
+        return (_sharedCellIndex, (self.key, self.width, self.height, self.positions))
+
+    def packGrid(self, grid):
+        "Returns the bitmask of the open cells that are True in grid"
+        mask = 0
+        for i, (x, y) in enumerate(self.positions):
+            if grid[x][y]: mask |= 1 << i
+        return mask
+
+_SHARED_CELL_INDEXES = {} # key -> CellIndex, for unpickled CellIndexes
+
+def _sharedCellIndex(key, width, height, positions):
+    cells = _SHARED_CELL_INDEXES.get(key)
+    if cells is None:
+        cells = CellIndex.__new__(CellIndex)
+        cells.width, cells.height, cells.positions = width, height, positions
+        cells._indexPositions()
+        cells = _SHARED_CELL_INDEXES[key] = cells
+    return cells
+
+class FoodMask:
+    """
+    An immutable set of food positions packed into a Python int: bit i is set
+    when cell i of a shared CellIndex has food.  Eating is a single bit clear,
+    the goal test is mask == 0 and hashing is an int hash.
+
+    FoodMask supports the read-only part of the Grid interface (foodMask[x][y],
+    count, asList, width, height), and asGrid() converts it back to a Grid for
+    code that needs the rest.
+    """
+    __slots__ = ('mask', 'cells')
+
+    def __init__(self, mask, cells):
+        self.mask = mask
+        self.cells = cells
+
+    def fromGrid(grid, cells):
+        return FoodMask(cells.packGrid(grid), cells)
+    fromGrid = staticmethod(fromGrid)
+
+    @property
+    def width(self):
+        return self.cells.width
+
+    @property
+    def height(self):
+        return self.cells.height
+
+    def hasFood(self, pos):
+        i = self.cells.index.get(pos)
+        return i is not None and (self.mask >> i) & 1 == 1
+
+    def eat(self, pos):
+        "Returns the FoodMask with any food at pos removed"
+        i = self.cells.index.get(pos)
+        if i is None or not (self.mask >> i) & 1: return self
+        return FoodMask(self.mask & ~(1 << i), self.cells)
+
+    def __getitem__(self, x):
+        return _FoodMaskColumn(self, x)
+
+    def __eq__(self, other):
+        if not isinstance(other, FoodMask): return False
+        return self.mask == other.mask and (self.cells is other.cells or self.cells.key == other.cells.key)
+
+    def __hash__(self):
+        return hash(self.mask)
+
+    def __str__(self):
+        return str(self.asGrid())
+
+    def count(self, item=True):
+        n = self.mask.bit_count()
+        if item: return n
+        return self.width * self.height - n
+
+    def asList(self, key=True):
+        if key is not True: return self.asGrid().asList(key)
+        positions = self.cells.positions
+        result = []
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            result.append(positions[low.bit_length() - 1])
+            mask ^= low
+        return result
+
+    def asGrid(self):
+        g = Grid(self.width, self.height)
+        for x, y in self.asList():
+            g[x][y] = True
+        return g
+
+    def copy(self):
+        return self
+
+    def deepCopy(self):
+        return self
+
+    def shallowCopy(self):
+        return self
+
+class _FoodMaskColumn:
+    "Supports foodMask[x][y] lookups"
+    __slots__ = ('food', 'x')
+
+    def __init__(self, food, x):
+        self.food = food
+        self.x = x
+
+    def __getitem__(self, y):
+        return self.food.hasFood((self.x, y))
+
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1,2)):
         return bitRep
@@ -368,16 +648,54 @@ class Actions:
         return (x + dx, y + dy)
     getSuccessor = staticmethod(getSuccessor)
 
+_ZOBRIST_KEYS = {} # feature -> key, memoizing _zobristDigest
+
+def _canonicalFeature(value):
+    "Integral floats become ints, so equal features have the same repr."
+    if isinstance(value, tuple): return tuple([_canonicalFeature(v) for v in value])
+    if isinstance(value, float) and value.is_integer(): return int(value)
+    return value
+
+def zobristKey(feature):
+    """
+    Returns the pseudo-random 64-bit key for a state feature such as
+    ('food', x, y).  Keys are taken from a hash of the feature's repr, so
+    every process assigns a feature the same key and state hashes can be
+    compared across processes.
+    """
+    key = _ZOBRIST_KEYS.get(feature)
+    if key is None:
+        digest = hashlib.sha1(repr(_canonicalFeature(feature)).encode()).digest()
+        key = _ZOBRIST_KEYS[feature] = int.from_bytes(digest[:8], 'big')
+    return key
+
+def agentZobristKey(index, agentState):
+    conf = agentState.configuration
+    if conf == None: return zobristKey(('agent', index, None))
+    return zobristKey(('agent', index, conf.pos, conf.direction, agentState.scaredTimer))
+
 class GameStateData:
     """
 
     """
+    # Food count cache (see getNumFood): _numFood is valid while food is _countedFood
+    _numFood = 0
+    _countedFood = None
+    # Zobrist hash of agents, food, capsules and score (see __hash__), or None if not computed
+    _hash = None
+
     def __init__( self, prevState = None ):
         """
         Generates a new data packet by copying information from its predecessor.
+
+        The food grid is shared with the predecessor (copy-on-write): it is
+        only copied by eatFood, so successors that eat nothing never touch
+        the board.
         """
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
+            self.food = prevState.food
+            self._numFood = prevState._numFood
+            self._countedFood = prevState._countedFood
             self.capsules = prevState.capsules[:]
             self.agentStates = self.copyAgentStates( prevState.agentStates )
             self.layout = prevState.layout
@@ -395,6 +713,8 @@ class GameStateData:
     def deepCopy( self ):
         state = GameStateData( self )
         state.food = self.food.deepCopy()
+        state._numFood, state._countedFood = self.getNumFood(), state.food
+        state._hash = self._hash
         state.layout = self.layout.deepCopy()
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
@@ -402,18 +722,50 @@ class GameStateData:
         state._capsuleEaten = self._capsuleEaten
         return state
 
+    def observationCopy( self ):
+        "A read-only copy for agents to observe (see FrozenGameStateData)"
+        return FrozenGameStateData( self )
+
+    def getNumFood( self ):
+        """
+        Returns the number of food pellets left, maintained incrementally by
+        eatFood.  The board is only recounted if food was replaced directly.
+        """
+        if self._countedFood is not self.food:
+            self._numFood, self._countedFood = self.food.count(), self.food
+        return self._numFood
+
+    def eatFood( self, position ):
+        """
+        Removes the food at position, copying the shared food grid first.
+        """
+        x, y = position
+        numFood = self.getNumFood()
+        self.food = self.food.copy()
+        self.food[x][y] = False
+        self._numFood, self._countedFood = numFood - 1, self.food
+
     def copyAgentStates( self, agentStates ):
         copiedStates = []
         for agentState in agentStates:
             copiedStates.append( agentState.copy() )
         return copiedStates
 
+    def __getstate__( self ):
+        # A pickled state recomputes its hash where it is unpickled, so a
+        # stale hash never short-circuits __eq__
+        state = self.__dict__.copy()
+        state.pop( '_hash', None )
+        return state
+
     def __eq__( self, other ):
         """
         Allows two states to be compared.
         """
         if other == None: return False
         # TODO Check for type of other
+        if self._hash is not None and getattr(other, '_hash', None) is not None and self._hash != other._hash:
+            return False
         if not self.agentStates == other.agentStates: return False
         if not self.food == other.food: return False
         if not self.capsules == other.capsules: return False
@@ -423,14 +775,45 @@ class GameStateData:
     def __hash__( self ):
         """
         Allows states to be keys of dictionaries.
+
+        The hash is the XOR of Zobrist keys for every agent, food pellet,
+        capsule and the score.  It is computed from scratch once, then kept
+        up to date by updateHash as successors are generated, so hashing a
+        state is O(1).  Code that edits a state in place must reset _hash to
+        None.
+        """
+        if self._hash is None:
+            h = zobristKey(('score', self.score))
+            for index, agentState in enumerate(self.agentStates):
+                h ^= agentZobristKey(index, agentState)
+            for x, y in self.food.asList():
+                h ^= zobristKey(('food', x, y))
+            for x, y in self.capsules:
+                h ^= zobristKey(('capsule', x, y))
+            self._hash = h
+        return self._hash
+
+    def updateHash( self, prevState, agentIndex ):
+        """
+        Derives this state's hash from prevState's after agentIndex moved,
+        by XORing out what changed and XORing in its replacement.
         """
-        for i, state in enumerate( self.agentStates ):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                #hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113* hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575 )
+        h = prevState._hash
+        if h is None or self._foodAdded != None:
+            self._hash = None
+            return
+        h ^= zobristKey(('score', prevState.score)) ^ zobristKey(('score', self.score))
+        if self._capsuleEaten != None or True in self._eaten:
+            # Scared timers or ghost positions may have changed for every agent
+            for index in range(len(self.agentStates)):
+                h ^= agentZobristKey(index, prevState.agentStates[index]) ^ agentZobristKey(index, self.agentStates[index])
+        else:
+            h ^= agentZobristKey(agentIndex, prevState.agentStates[agentIndex]) ^ agentZobristKey(agentIndex, self.agentStates[agentIndex])
+        if self._foodEaten != None:
+            h ^= zobristKey(('food',) + tuple(self._foodEaten))
+        if self._capsuleEaten != None:
+            h ^= zobristKey(('capsule',) + tuple(self._capsuleEaten))
+        self._hash = h
 
     def __str__( self ):
         width, height = self.layout.width, self.layout.height
@@ -489,6 +872,7 @@ class GameStateData:
         Creates an initial game state from a layout array (see layout.py).
         """
         self.food = layout.food.copy()
+        self._numFood, self._countedFood = self.food.count(), self.food
         #self.capsules = []
         self.capsules = layout.capsules[:]
         self.layout = layout
@@ -504,6 +888,37 @@ class GameStateData:
             self.agentStates.append( AgentState( Configuration( pos, Directions.STOP), isPacman) )
         self._eaten = [False for a in self.agentStates]
 
+class FrozenGameStateData( GameStateData ):
+    """
+    A read-only copy of a GameStateData, handed to agents as an observation
+    in place of a deep copy.
+
+    The layout is shared rather than re-parsed, the food grid is copied
+    cheaply (a BitGrid copy shares its immutable int) and agent states and
+    capsules are copied as for any successor.  Assigning to any attribute
+    other than the cached food count and hash raises an Exception; successors
+    and deep copies of a frozen copy are ordinary, editable GameStateData.
+    """
+    _CACHES = ('_numFood', '_countedFood', '_hash')
+    _frozen = False
+
+    def __init__( self, prevState ):
+        GameStateData.__init__( self, prevState )
+        self.food = prevState.food.copy()
+        self._numFood, self._countedFood = prevState.getNumFood(), self.food
+        self._eaten = list( prevState._eaten )
+        self._hash = prevState._hash
+        self._agentMoved = prevState._agentMoved
+        self._foodEaten = prevState._foodEaten
+        self._foodAdded = prevState._foodAdded
+        self._capsuleEaten = prevState._capsuleEaten
+        self._frozen = True
+
+    def __setattr__( self, name, value ):
+        if self._frozen and name not in self._CACHES:
+            raise Exception('Observations are read-only: generate a successor or take a deepCopy to edit the state')
+        object.__setattr__( self, name, value )
+
 try:
     import boinc
     _BOINC_ENABLED = True
@@ -515,7 +930,11 @@ class Game:
     The Game manages the control flow, soliciting actions from agents.
     """
 
-    def __init__( self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False ):
+    def __init__( self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False, observationViews=False ):
+        """
+        If observationViews is set, agents observe read-only views of the
+        state (see GameState.observationView) instead of deep copies.
+        """
         self.agentCrashed = False
         self.agents = agents
         self.display = display
@@ -524,6 +943,7 @@ class Game:
         self.gameOver = False
         self.muteAgents = muteAgents
         self.catchExceptions = catchExceptions
+        self.observationViews = observationViews
         self.moveHistory = []
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
@@ -544,6 +964,11 @@ class Game:
         self.agentCrashed = True
         self.rules.agentCrash(self, agentIndex)
 
+    def _observe( self ):
+        "The copy of the state handed to an agent"
+        if self.observationViews: return self.state.observationView()
+        return self.state.deepCopy()
+
     OLD_STDOUT = None
     OLD_STDERR = None
 
@@ -590,7 +1015,7 @@ class Game:
                         timed_func = TimeoutFunction(agent.registerInitialState, int(self.rules.getMaxStartupTime(i)))
                         try:
                             start_time = time.time()
-                            timed_func(self.state.deepCopy())
+                            timed_func(self._observe())
                             time_taken = time.time() - start_time
                             self.totalAgentTimes[i] += time_taken
                         except TimeoutFunctionException:
@@ -604,7 +1029,7 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    agent.registerInitialState(self.state.deepCopy())
+                    agent.registerInitialState(self._observe())
                 ## TODO: could this exceed the total time
                 self.unmute()
 
@@ -624,7 +1049,7 @@ class Game:
                         timed_func = TimeoutFunction(agent.observationFunction, int(self.rules.getMoveTimeout(agentIndex)))
                         try:
                             start_time = time.time()
-                            observation = timed_func(self.state.deepCopy())
+                            observation = timed_func(self._observe())
                         except TimeoutFunctionException:
                             skip_action = True
                         move_time += time.time() - start_time
@@ -634,10 +1059,10 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    observation = agent.observationFunction(self.state.deepCopy())
+                    observation = agent.observationFunction(self._observe())
                 self.unmute()
             else:
-                observation = self.state.deepCopy()
+                observation = self._observe()
 
             # Solicit an action
             action = None
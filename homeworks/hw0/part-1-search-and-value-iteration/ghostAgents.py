@@ -18,6 +18,7 @@ from game import Directions
 import random
 from util import manhattanDistance
 import util
+import distanceCalculator
 
 class GhostAgent( Agent ):
     def __init__( self, index ):
@@ -64,7 +65,7 @@ class DirectionalGhost( GhostAgent ):
         pacmanPosition = state.getPacmanPosition()
 
         # Select best actions given the state
-        distancesToPacman = [manhattanDistance( pos, pacmanPosition ) for pos in newPositions]
+        distancesToPacman = [self.getDistance( state, pos, pacmanPosition ) for pos in newPositions]
         if isScared:
             bestScore = max( distancesToPacman )
             bestProb = self.prob_scaredFlee
@@ -79,3 +80,12 @@ class DirectionalGhost( GhostAgent ):
         for a in legalActions: dist[a] += ( 1-bestProb ) / len(legalActions)
         dist.normalize()
         return dist
+
+    def getDistance( self, state, pos1, pos2 ):
+        "The distance used to rank moves; overridden by MazeDirectionalGhost."
+        return manhattanDistance( pos1, pos2 )
+
+class MazeDirectionalGhost( DirectionalGhost ):
+    "A DirectionalGhost that ranks its moves by maze distance rather than Manhattan distance."
+    def getDistance( self, state, pos1, pos2 ):
+        return distanceCalculator.getOracle( state.data.layout ).distance( pos1, pos2 )
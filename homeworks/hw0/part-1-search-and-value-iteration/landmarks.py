@@ -0,0 +1,145 @@
+# landmarks.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Landmark (ALT) heuristics, which know about walls but cost much less memory
+than the all-pairs table of distanceCalculator.py.
+
+A few landmark cells are chosen per layout and the maze distance from each
+landmark to every open cell is computed once.  By the triangle inequality,
+for any landmark L
+
+  |d(L, goal) - d(L, position)| <= d(position, goal)
+
+so the largest such difference is an admissible (and consistent) estimate
+of the maze distance.  Tables are shared by every Layout with the same text:
+
+> python pacman.py -l bigMaze -p SearchAgent -a fn=astar,heuristic=landmarkHeuristic -z .5
+"""
+
+from array import array
+from collections import OrderedDict, deque
+import distanceCalculator
+
+NUM_LANDMARKS = 8
+UNREACHABLE = -1
+
+LANDMARK_CACHE_SIZE = 8 # Tables kept in memory, besides those held by Layouts
+_LANDMARK_CACHE = OrderedDict() # (layout text hash, number of landmarks) -> LandmarkTable, least recently used first
+
+class LandmarkTable:
+    """
+    Maze distances from a set of landmark cells to every open cell.
+
+    Landmarks are picked by farthest point selection: each new landmark is
+    the open cell farthest from the landmarks chosen so far, which spreads
+    them to the ends of the maze where their bounds are tightest.  Cells are
+    numbered by the CellIndex of the CompiledLayout (see layout.py), and
+    distances[k][i] is the distance from landmark k to cell i, or
+    UNREACHABLE.
+    """
+
+    def __init__(self, compiled, numLandmarks=NUM_LANDMARKS):
+        """
+          compiled: the CompiledLayout of the layout
+          numLandmarks: how many landmarks to place; small boards may get fewer
+        """
+        self.cells = compiled.cells
+        self.numLandmarks = numLandmarks
+        self.landmarks = []
+        self.distances = []
+        self._goals = {} # goal -> [(distances, distance from the landmark to goal)]
+        self._selectLandmarks(compiled, numLandmarks)
+
+    def _distancesFrom(self, compiled, source):
+        "Breadth-first search over the compiled move table from cell source."
+        offsets, targets = compiled.offsets, compiled.targets
+        distances = array('i', [UNREACHABLE]) * len(self.cells.positions)
+        distances[source] = 0
+        frontier = deque([source])
+        while frontier:
+            cell = frontier.popleft()
+            nextDistance = distances[cell] + 1
+            for edge in range(offsets[cell], offsets[cell + 1]):
+                neighbor = targets[edge]
+                if distances[neighbor] == UNREACHABLE:
+                    distances[neighbor] = nextDistance
+                    frontier.append(neighbor)
+        return distances
+
+    def _selectLandmarks(self, compiled, numLandmarks):
+        numCells = len(self.cells.positions)
+        if numCells == 0: return
+        # Cells no landmark reaches count as infinitely far, so every
+        # connected region gets a landmark before any region gets a second
+        far = numCells + 1
+        nearest = [far] * numCells
+        seed = self._distancesFrom(compiled, 0)
+        candidate = max(range(numCells), key=lambda i: seed[i])
+        while len(self.landmarks) < numLandmarks and nearest[candidate] > 0:
+            distances = self._distancesFrom(compiled, candidate)
+            self.landmarks.append(candidate)
+            self.distances.append(distances)
+            for i, d in enumerate(distances):
+                if d != UNREACHABLE and d < nearest[i]: nearest[i] = d
+            candidate = max(range(numCells), key=nearest.__getitem__)
+
+    def getLandmarkPositions(self):
+        return [self.cells.positions[i] for i in self.landmarks]
+
+    def lowerBound(self, position, goal):
+        """
+        Returns a lower bound on the maze distance between two open integer
+        positions.  Positions in different regions of the board get 0.
+        """
+        terms = self._goals.get(goal)
+        if terms is None:
+            g = self.cells.index[goal]
+            terms = self._goals[goal] = [(distances, distances[g]) for distances in self.distances
+                                         if distances[g] != UNREACHABLE]
+        i = self.cells.index[position]
+        best = 0
+        for distances, toGoal in terms:
+            d = distances[i]
+            if d == UNREACHABLE: continue
+            bound = d - toGoal if d > toGoal else toGoal - d
+            if bound > best: best = bound
+        return best
+
+def getLandmarkTable(layout, numLandmarks=NUM_LANDMARKS):
+    """
+    Returns the LandmarkTable of a layout, building it on first use.  Tables
+    are cached on the Layout object and in-process by layout text hash for
+    the LANDMARK_CACHE_SIZE most recently used layouts.
+    """
+    table = getattr(layout, 'landmarkTable', None)
+    if table is not None and table.numLandmarks == numLandmarks: return table
+    key = (distanceCalculator.layoutKey(layout), numLandmarks)
+    table = _LANDMARK_CACHE.get(key)
+    if table is None:
+        table = _LANDMARK_CACHE[key] = LandmarkTable(layout.getCompiledLayout(), numLandmarks)
+        while len(_LANDMARK_CACHE) > LANDMARK_CACHE_SIZE:
+            _LANDMARK_CACHE.popitem(last=False)
+    else:
+        _LANDMARK_CACHE.move_to_end(key)
+    layout.landmarkTable = table
+    return table
+
+def landmarkHeuristic(position, problem):
+    """
+    The ALT heuristic for a PositionSearchProblem: a lower bound on the maze
+    distance to problem.goal.  It counts moves, so it is admissible for the
+    default cost of 1 per step (or any cost function that never goes below 1).
+    """
+    return getLandmarkTable(problem.layout).lowerBound(position, problem.goal)
@@ -13,12 +13,25 @@
 
 
 from util import manhattanDistance
-from game import Grid
+from game import Grid, BitGrid, CellIndex, Directions, Actions
+from array import array
+from collections import OrderedDict
+import distanceCalculator
+import hashlib
 import os
+import pickle
 import random
-from functools import reduce
 
-VISIBILITY_MATRIX_CACHE = {}
+VISIBILITY_MATRIX_CACHE_SIZE = 8 # Visibility matrices kept in memory
+VISIBILITY_MATRIX_CACHE = OrderedDict() # layout text hash -> VisibilityMatrix, least recently used first
+COMPILED_LAYOUT_CACHE_SIZE = 8 # Compiled layouts kept in memory, besides those held by Layouts
+COMPILED_LAYOUT_CACHE = OrderedDict() # layout text hash -> CompiledLayout, least recently used first
+
+LAYOUT_CACHE_SIZE = 64 # Parsed layouts kept in memory by loadLayoutFile
+LAYOUT_CACHE_DIR = os.environ.get('PACMAN_LAYOUT_CACHE') # Directory of parsed layouts on disk, or None
+_LAYOUT_CACHE = OrderedDict() # (path, mtime, size) -> Layout, least recently used first
+_LAYOUT_INDEX = {} # layouts directory -> (mtime, {file name: path})
+_LAYOUT_RECORD_VERSION = 1
 
 class Layout:
     """
@@ -29,7 +42,7 @@ class Layout:
         self.width = len(layoutText[0])
         self.height= len(layoutText)
         self.walls = Grid(self.width, self.height, False)
-        self.food = Grid(self.width, self.height, False)
+        self.food = BitGrid(self.width, self.height, False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
@@ -41,26 +54,32 @@ class Layout:
     def getNumGhosts(self):
         return self.numGhosts
 
-    def initializeVisibilityMatrix(self):
-        global VISIBILITY_MATRIX_CACHE
-        if reduce(str.__add__, self.layoutText) not in VISIBILITY_MATRIX_CACHE:
-            from game import Directions
-            vecs = [(-0.5,0), (0.5,0),(0,-0.5),(0,0.5)]
-            dirs = [Directions.NORTH, Directions.SOUTH, Directions.WEST, Directions.EAST]
-            vis = Grid(self.width, self.height, {Directions.NORTH:set(), Directions.SOUTH:set(), Directions.EAST:set(), Directions.WEST:set(), Directions.STOP:set()})
-            for x in range(self.width):
-                for y in range(self.height):
-                    if self.walls[x][y] == False:
-                        for vec, direction in zip(vecs, dirs):
-                            dx, dy = vec
-                            nextx, nexty = x + dx, y + dy
-                            while (nextx + nexty) != int(nextx) + int(nexty) or not self.walls[int(nextx)][int(nexty)] :
-                                vis[x][y][direction].add((nextx, nexty))
-                                nextx, nexty = x + dx, y + dy
-            self.visibility = vis
-            VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)] = vis
-        else:
-            self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
+    def getCompiledLayout(self):
+        """
+        Returns the CompiledLayout of this layout, shared by every Layout
+        parsed from the same text while it is among the
+        COMPILED_LAYOUT_CACHE_SIZE most recently used.
+        """
+        compiled = getattr(self, '_compiled', None)
+        if compiled is None:
+            key = distanceCalculator.layoutKey(self)
+            compiled = COMPILED_LAYOUT_CACHE.get(key)
+            if compiled is None:
+                compiled = COMPILED_LAYOUT_CACHE[key] = CompiledLayout(self.walls)
+                while len(COMPILED_LAYOUT_CACHE) > COMPILED_LAYOUT_CACHE_SIZE:
+                    COMPILED_LAYOUT_CACHE.popitem(last=False)
+            else:
+                COMPILED_LAYOUT_CACHE.move_to_end(key)
+            self._compiled = compiled
+        return compiled
+
+    def initializeVisibilityMatrix(self, cacheDir=None):
+        """
+        Sets self.visibility to the VisibilityMatrix of this layout, which is
+        shared by every Layout with the same text and, if cacheDir (by default
+        LAYOUT_CACHE_DIR) is set, stored on disk.
+        """
+        self.visibility = getVisibilityMatrix(self, cacheDir)
 
     def isWall(self, pos):
         x, col = pos
@@ -84,14 +103,79 @@ class Layout:
         return pos
 
     def isVisibleFrom(self, ghostPos, pacPos, pacDirection):
-        row, col = [int(x) for x in pacPos]
-        return ghostPos in self.visibility[row][col][pacDirection]
+        if getattr(self, 'visibility', None) is None: self.initializeVisibilityMatrix()
+        return self.visibility.isVisibleFrom(ghostPos, pacPos, pacDirection)
 
     def __str__(self):
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        """
+        Copies the board without re-parsing the text.  Derived tables (the
+        compiled layout, visibility, distance oracle) are shared.
+        """
+        layout = Layout.__new__(Layout)
+        layout.__dict__.update(self.__dict__)
+        layout.walls = self.walls.copy()
+        layout.food = self.food.copy()
+        layout.capsules = self.capsules[:]
+        layout.agentPositions = self.agentPositions[:]
+        layout.layoutText = self.layoutText[:]
+        return layout
+
+    def toRecord(self):
+        """
+        The parsed board as plain values, with walls and food as bitmasks
+        (bit x * height + y), for the on-disk cache.
+        """
+        walls, food = 0, 0
+        for x, y in self.walls.asList():
+            walls |= 1 << (x * self.height + y)
+        for x, y in self.food.asList():
+            food |= 1 << (x * self.height + y)
+        return (_LAYOUT_RECORD_VERSION, self.width, self.height, walls, food,
+                list(self.capsules), list(self.agentPositions), self.numGhosts, list(self.layoutText))
+
+    def fromGrids(walls, food, capsules, agentPositions, layoutText):
+        """
+        Builds a Layout from an already parsed board, e.g. a generated one.
+        agentPositions lists (isPacman, position) pairs, pacman first.
+        """
+        layout = Layout.__new__(Layout)
+        layout.width, layout.height = walls.width, walls.height
+        layout.walls = walls
+        layout.food = food
+        layout.capsules = list(capsules)
+        layout.agentPositions = list(agentPositions)
+        layout.numGhosts = len([isPacman for isPacman, pos in agentPositions if not isPacman])
+        layout.layoutText = layoutText
+        layout.totalFood = food.count()
+        return layout
+    fromGrids = staticmethod(fromGrids)
+
+    def fromRecord(record):
+        """
+        Rebuilds a Layout from toRecord() without parsing its text.
+        """
+        version, width, height, walls, food, capsules, agentPositions, numGhosts, layoutText = record
+        if version != _LAYOUT_RECORD_VERSION: raise ValueError('Unknown layout record version')
+        layout = Layout.__new__(Layout)
+        layout.width, layout.height = width, height
+        layout.walls = Grid(width, height, False)
+        while walls:
+            low = walls & -walls
+            i = low.bit_length() - 1
+            layout.walls[i // height][i % height] = True
+            walls ^= low
+        layout.food = BitGrid(width, height, False)
+        layout.food.bits = food
+        layout.capsules = [tuple(pos) for pos in capsules]
+        layout.agentPositions = [(isPacman, tuple(pos)) for isPacman, pos in agentPositions]
+        layout.numGhosts = numGhosts
+        layout.layoutText = layoutText
+        layout.totalFood = layout.food.count()
+        return layout
+    fromRecord = staticmethod(fromRecord)
 
     def processLayoutText(self, layoutText):
         """
@@ -129,22 +213,245 @@ class Layout:
         elif layoutChar in  ['1', '2', '3', '4']:
             self.agentPositions.append( (int(layoutChar), (x,y)))
             self.numGhosts += 1
+class CompiledLayout:
+    """
+    The moves available on a board, computed once so that search problems
+    and the game rules look them up instead of probing the walls.
+
+      cells:        a CellIndex (see game.py) giving every open cell an id
+      offsets:      the moves out of cell i are edges offsets[i] to offsets[i+1]-1
+      targets:      the cell id each edge leads to
+      edgeActions:  the action that takes each edge
+      successors:   position -> tuple of (nextPosition, action), in the
+                    North, South, East, West order of the search problems
+      legalActions: position -> tuple of the actions Actions.getPossibleActions
+                    allows there, including STOP
+    """
+    MOVES = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+
+    def __init__(self, walls):
+        self.walls = walls
+        self.cells = CellIndex(walls)
+        self.offsets = array('i', [0])
+        self.targets = array('i')
+        self.edgeActions = []
+        self.successors = {}
+        self.legalActions = {}
+        for x, y in self.cells.positions:
+            moves = []
+            for action in self.MOVES:
+                dx, dy = Actions._directions[action]
+                nextx, nexty = x + dx, y + dy
+                if 0 <= nextx < walls.width and 0 <= nexty < walls.height and not walls[nextx][nexty]:
+                    self.targets.append(self.cells.index[(nextx, nexty)])
+                    self.edgeActions.append(action)
+                    moves.append(((nextx, nexty), action))
+            self.offsets.append(len(self.targets))
+            self.successors[(x, y)] = tuple(moves)
+            self.legalActions[(x, y)] = tuple(action for next, action in moves) + (Directions.STOP,)
+
+    def getSuccessors(self, position):
+        """
+        Returns the (nextPosition, action) pairs leaving an open position.
+        """
+        return self.successors[position]
+
+    def getLegalActions(self, position):
+        """
+        Returns a new list of the legal actions at an integer position.
+        """
+        return list(self.legalActions[position])
+
+class VisibilityMatrix:
+    """
+    What pacman sees when looking in each direction from each open cell.
+
+    A ray leaves the cell in half steps and runs until it reaches a wall.
+    Every point it passes lies on pacman's row (East, West) or column
+    (North, South), so a ray is stored as a bitmask over the doubled
+    coordinates of that line: bit 2x + 1 of an East ray means that
+    (x + 0.5, y) is visible.  Nothing is visible when pacman is stopped.
+    """
+    HORIZONTAL = (Directions.EAST, Directions.WEST)
+
+    def __init__(self, walls, rays=None):
+        """
+          walls: A Grid of wall indicator variables
+          rays:  A precomputed (x, y, direction) -> bitmask dictionary
+        """
+        if rays is None:
+            rays = {}
+            for y in range(walls.height):
+                self._castRays(rays, [walls[x][y] for x in range(walls.width)], lambda i: (i, y), Directions.EAST, Directions.WEST)
+            for x in range(walls.width):
+                self._castRays(rays, [walls[x][y] for y in range(walls.height)], lambda i: (x, i), Directions.NORTH, Directions.SOUTH)
+        self.rays = rays
+
+    def _castRays(self, rays, line, cell, forward, backward):
+        """
+        Casts the rays along one row or column: from cell i of a run of open
+        cells a..b, the forward ray covers the doubled coordinates 2i+1 to
+        2b+1 and the backward ray covers 2a-1 to 2i-1.
+        """
+        i = 0
+        while i < len(line):
+            if line[i]:
+                i += 1
+                continue
+            a = i
+            while i < len(line) and not line[i]: i += 1
+            b = i - 1
+            low = max(0, 2 * a - 1)
+            for j in range(a, b + 1):
+                rays[cell(j) + (forward,)] = ((1 << (2 * (b - j) + 1)) - 1) << (2 * j + 1)
+                rays[cell(j) + (backward,)] = ((1 << (2 * j - low)) - 1) << low
+
+    def isVisibleFrom(self, ghostPos, pacPos, pacDirection):
+        """
+        Returns whether pacman at pacPos, facing pacDirection, sees ghostPos.
+        """
+        mask = self.rays.get((int(pacPos[0]), int(pacPos[1]), pacDirection))
+        if not mask: return False
+        gx, gy = ghostPos[0] * 2, ghostPos[1] * 2
+        if gx != int(gx) or gy != int(gy): return False # not on a half step
+        if pacDirection in self.HORIZONTAL:
+            onLine, along = gy == 2 * int(pacPos[1]), int(gx)
+        else:
+            onLine, along = gx == 2 * int(pacPos[0]), int(gy)
+        return onLine and along >= 0 and (mask >> along) & 1 == 1
+
+    def getVisiblePositions(self, pacPos, pacDirection):
+        """
+        Returns the points (on half steps) visible from pacPos.
+        """
+        x, y = int(pacPos[0]), int(pacPos[1])
+        mask = self.rays.get((x, y, pacDirection), 0)
+        points = [i / 2.0 for i in range(mask.bit_length()) if (mask >> i) & 1]
+        if pacDirection in self.HORIZONTAL: return [(p, y) for p in points]
+        return [(x, p) for p in points]
+
+def getVisibilityMatrix(layout, cacheDir=None):
+    """
+    Returns the VisibilityMatrix for a layout, cached in memory by layout text
+    hash (for the VISIBILITY_MATRIX_CACHE_SIZE most recently used layouts)
+    and, if cacheDir (by default LAYOUT_CACHE_DIR) is set, on disk.
+    """
+    key = distanceCalculator.layoutKey(layout)
+    matrix = VISIBILITY_MATRIX_CACHE.get(key)
+    if matrix is not None:
+        VISIBILITY_MATRIX_CACHE.move_to_end(key)
+        return matrix
+    if cacheDir is None: cacheDir = LAYOUT_CACHE_DIR
+    path = os.path.join(cacheDir, key + '.vis') if cacheDir else None
+    if path is not None and os.path.exists(path):
+        try:
+            f = open(path, 'rb')
+            try: matrix = VisibilityMatrix(layout.walls, pickle.load(f))
+            finally: f.close()
+        except Exception:
+            matrix = None # A damaged file is simply recomputed
+    if matrix is None:
+        matrix = VisibilityMatrix(layout.walls)
+        if path is not None:
+            if not os.path.isdir(cacheDir): os.makedirs(cacheDir)
+            temp = '%s.%d.tmp' % (path, os.getpid())
+            f = open(temp, 'wb')
+            try: pickle.dump(matrix.rays, f, pickle.HIGHEST_PROTOCOL)
+            finally: f.close()
+            os.replace(temp, path)
+    VISIBILITY_MATRIX_CACHE[key] = matrix
+    while len(VISIBILITY_MATRIX_CACHE) > VISIBILITY_MATRIX_CACHE_SIZE:
+        VISIBILITY_MATRIX_CACHE.popitem(last=False)
+    return matrix
+
 def getLayout(name, back = 2):
-    if name.endswith('.lay'):
-        layout = tryToLoad('layouts/' + name)
-        if layout == None: layout = tryToLoad(name)
-    else:
-        layout = tryToLoad('layouts/' + name + '.lay')
-        if layout == None: layout = tryToLoad(name + '.lay')
-    if layout == None and back >= 0:
-        curdir = os.path.abspath('.')
-        os.chdir('..')
-        layout = getLayout(name, back -1)
-        os.chdir(curdir)
-    return layout
+    """
+    Loads a layout by name, looking for layouts/<name>.lay and then <name>.lay
+    in the working directory and up to back + 1 of its parents.  Returns
+    None if no such file exists.
+    """
+    path = findLayout(name, back)
+    if path == None: return None
+    return loadLayoutFile(path)
+
+def findLayout(name, back = 2):
+    """
+    Returns the path of the file getLayout would load, or None.  The working
+    directory is never changed.
+    """
+    fileName = name if name.endswith('.lay') else name + '.lay'
+    directory = os.path.abspath('.')
+    for level in range(back + 2):
+        path = _findInLayoutsDir(os.path.join(directory, 'layouts'), fileName)
+        if path == None and os.path.isfile(os.path.join(directory, fileName)):
+            path = os.path.join(directory, fileName)
+        if path != None: return path
+        directory = os.path.dirname(directory)
+    return None
+
+def _findInLayoutsDir(layoutsDir, fileName):
+    "Looks fileName up in an index of the .lay files of layoutsDir"
+    if os.path.dirname(fileName):
+        path = os.path.join(layoutsDir, fileName)
+        return path if os.path.isfile(path) else None
+    try: mtime = os.stat(layoutsDir).st_mtime_ns
+    except OSError: return None
+    indexed = _LAYOUT_INDEX.get(layoutsDir)
+    if indexed == None or indexed[0] != mtime:
+        files = dict((f, os.path.join(layoutsDir, f)) for f in os.listdir(layoutsDir) if f.endswith('.lay'))
+        indexed = _LAYOUT_INDEX[layoutsDir] = (mtime, files)
+    return indexed[1].get(fileName)
 
 def tryToLoad(fullname):
     if(not os.path.exists(fullname)): return None
-    f = open(fullname)
-    try: return Layout([line.strip() for line in f])
+    return loadLayoutFile(fullname)
+
+def loadLayoutFile(path):
+    """
+    Returns a fresh copy of the Layout in a .lay file.
+
+    Parsed layouts are kept in an in-process LRU keyed by path and
+    modification time, and, if LAYOUT_CACHE_DIR (environment variable
+    PACMAN_LAYOUT_CACHE) is set, stored there as bitmask records that later
+    processes load without parsing the text.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    layout = _LAYOUT_CACHE.get(key)
+    if layout != None:
+        _LAYOUT_CACHE.move_to_end(key)
+        return layout.deepCopy()
+
+    cacheFile = None
+    if LAYOUT_CACHE_DIR:
+        cacheFile = os.path.join(LAYOUT_CACHE_DIR, hashlib.sha1(repr(key).encode()).hexdigest() + '.layc')
+        layout = _readLayoutRecord(cacheFile)
+    if layout == None:
+        f = open(path)
+        try: layout = Layout([line.strip() for line in f])
+        finally: f.close()
+        if cacheFile != None: _writeLayoutRecord(cacheFile, layout)
+
+    _LAYOUT_CACHE[key] = layout
+    while len(_LAYOUT_CACHE) > LAYOUT_CACHE_SIZE:
+        _LAYOUT_CACHE.popitem(last=False)
+    return layout.deepCopy()
+
+def _readLayoutRecord(cacheFile):
+    if not os.path.exists(cacheFile): return None
+    try:
+        f = open(cacheFile, 'rb')
+        try: return Layout.fromRecord(pickle.load(f))
+        finally: f.close()
+    except Exception:
+        return None # A stale or damaged record is simply re-parsed
+
+def _writeLayoutRecord(cacheFile, layout):
+    if not os.path.isdir(LAYOUT_CACHE_DIR): os.makedirs(LAYOUT_CACHE_DIR)
+    # Write then rename, so concurrent readers never see a partial record
+    temp = '%s.%d.tmp' % (cacheFile, os.getpid())
+    f = open(temp, 'wb')
+    try: pickle.dump(layout.toRecord(), f, pickle.HIGHEST_PROTOCOL)
     finally: f.close()
+    os.replace(temp, cacheFile)
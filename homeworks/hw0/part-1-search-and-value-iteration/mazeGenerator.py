@@ -0,0 +1,170 @@
+# mazeGenerator.py
+# ----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Procedurally generated layouts, for boards larger than the ones in layouts/.
+
+  perfect: a maze with exactly one path between any two cells
+  braided: a perfect maze with some dead ends opened up, so it has loops
+  rooms:   an open board divided into rooms joined by doors
+
+Pacman starts in the top right corner and there is always food in the bottom
+left corner (1,1), the goal of PositionSearchProblem; foodDensity scatters
+more.  generateLayout returns a Layout directly, without writing a .lay file:
+
+> board = mazeGenerator.generateLayout('braided', 501, 501, seed=3)
+
+or, from the command line,
+
+> python mazeGenerator.py -k rooms -W 80 -H 40 -f 0.2 > layouts/generatedRooms.lay
+"""
+
+from game import Grid, BitGrid
+import layout
+import random
+
+KINDS = ['perfect', 'braided', 'rooms']
+
+WALL, OPEN = ord('%'), ord(' ')
+
+def perfectMaze(width, height, rand):
+    """
+    Returns the rows (top first) of a maze carved by a randomized depth
+    first search.  Cells sit on odd coordinates, so width and height should
+    be odd.
+    """
+    rows = [bytearray([WALL]) * width for y in range(height)]
+    rows[1][1] = OPEN
+    stack = [(1, 1)]
+    while stack:
+        x, y = stack[-1]
+        options = [(dx, dy) for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 < x + dx < width - 1 and 0 < y + dy < height - 1 and rows[y + dy][x + dx] == WALL]
+        if not options:
+            stack.pop()
+            continue
+        dx, dy = rand.choice(options)
+        rows[y + dy // 2][x + dx // 2] = OPEN
+        rows[y + dy][x + dx] = OPEN
+        stack.append((x + dx, y + dy))
+    return rows
+
+def braid(rows, fraction, rand):
+    """
+    Opens up a fraction of the dead ends of a perfect maze by knocking down
+    one of their walls, which adds loops.
+    """
+    height, width = len(rows), len(rows[0])
+    for y in range(1, height - 1, 2):
+        for x in range(1, width - 1, 2):
+            walls = [(dx, dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)) if rows[y + dy][x + dx] == WALL]
+            if len(walls) < 3 or rand.random() >= fraction: continue
+            inner = [(dx, dy) for dx, dy in walls if 0 < x + 2 * dx < width - 1 and 0 < y + 2 * dy < height - 1]
+            if inner:
+                dx, dy = rand.choice(inner)
+                rows[y + dy][x + dx] = OPEN
+    return rows
+
+def rooms(width, height, roomSize, rand):
+    """
+    Returns the rows of a board split into rooms of about roomSize cells a
+    side, with a door in every wall segment between two rooms.
+    """
+    rows = [bytearray([WALL]) * width] + [bytearray([WALL]) + bytearray([OPEN]) * (width - 2) + bytearray([WALL])
+                                          for y in range(height - 2)] + [bytearray([WALL]) * width]
+    wallXs = list(range(roomSize + 1, width - 2, roomSize + 1))
+    wallYs = list(range(roomSize + 1, height - 2, roomSize + 1))
+    for x in wallXs:
+        for y in range(1, height - 1): rows[y][x] = WALL
+    for y in wallYs:
+        for x in range(1, width - 1): rows[y][x] = WALL
+    # One door per segment, between consecutive crossings
+    xs, ys = [0] + wallXs + [width - 1], [0] + wallYs + [height - 1]
+    for x in wallXs:
+        for top, bottom in zip(ys, ys[1:]):
+            rows[rand.randrange(top + 1, bottom)][x] = OPEN
+    for y in wallYs:
+        for left, right in zip(xs, xs[1:]):
+            rows[y][rand.randrange(left + 1, right)] = OPEN
+    return rows
+
+def generateLayout(kind, width, height, foodDensity=0.0, braidFraction=0.5, roomSize=8, numGhosts=0, seed=0):
+    """
+    Returns a Layout of the given kind (see KINDS) and size, which must be at
+    least 5 by 5.  Every open cell other than pacman's start holds food with
+    probability foodDensity; ghosts start on random open cells.
+    """
+    if kind not in KINDS: raise Exception('Unknown maze kind %s, choose from %s' % (kind, ', '.join(KINDS)))
+    if width < 5 or height < 5: raise Exception('Generated layouts must be at least 5x5')
+    rand = random.Random(seed)
+    if kind == 'rooms':
+        rows = rooms(width, height, roomSize, rand)
+        pacman = (width - 2, height - 2)
+    else:
+        # Carve an odd sized maze, then pad it with walls on the top and right
+        mazeWidth, mazeHeight = width - (width % 2 == 0), height - (height % 2 == 0)
+        rows = perfectMaze(mazeWidth, mazeHeight, rand)
+        if kind == 'braided': braid(rows, braidFraction, rand)
+        rows = [bytearray([WALL]) * width for y in range(height - mazeHeight)] + \
+               [row + bytearray([WALL]) * (width - mazeWidth) for row in rows]
+        pacman = (mazeWidth - 2, mazeHeight - 2)
+    goal = (1, 1)
+
+    # Rows are listed top first, while positions count y from the bottom
+    openCells = [(x, height - 1 - r) for r, row in enumerate(rows) for x in range(width) if row[x] == OPEN]
+    ghosts = sorted(rand.sample([pos for pos in openCells if pos not in (pacman, goal)], numGhosts)) if numGhosts else []
+    food = set([goal])
+    if foodDensity > 0:
+        food.update(pos for pos in openCells if rand.random() < foodDensity)
+    food.difference_update([pacman] + ghosts)
+
+    walls = Grid(width, height, False)
+    walls.data = [[rows[height - 1 - y][x] == WALL for y in range(height)] for x in range(width)]
+    foodGrid = BitGrid(width, height, False)
+    for x, y in food:
+        foodGrid.bits |= 1 << (x * height + y)
+
+    text = [row.decode() for row in rows]
+    marks = [(pos, '.') for pos in food] + [(pos, 'G') for pos in ghosts] + [(pacman, 'P')]
+    for (x, y), char in marks:
+        r = height - 1 - y
+        text[r] = text[r][:x] + char + text[r][x + 1:]
+    agentPositions = [(True, pacman)] + [(False, pos) for pos in ghosts]
+    return layout.Layout.fromGrids(walls, foodGrid, [], agentPositions, text)
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser('USAGE: python mazeGenerator.py <options> > layouts/name.lay')
+    parser.add_option('-k', '--kind', dest='kind', default='perfect',
+                      help='One of %s [Default: %%default]' % ', '.join(KINDS))
+    parser.add_option('-W', '--width', dest='width', type='int', default=41, help='Board width [Default: %default]')
+    parser.add_option('-H', '--height', dest='height', type='int', default=21, help='Board height [Default: %default]')
+    parser.add_option('-f', '--foodDensity', dest='foodDensity', type='float', default=0.0,
+                      help='Chance that an open cell holds food [Default: %default]')
+    parser.add_option('-b', '--braid', dest='braidFraction', type='float', default=0.5,
+                      help='Fraction of dead ends opened in braided mazes [Default: %default]')
+    parser.add_option('-r', '--roomSize', dest='roomSize', type='int', default=8,
+                      help='Side of the rooms of a rooms layout [Default: %default]')
+    parser.add_option('-g', '--ghosts', dest='numGhosts', type='int', default=0, help='Number of ghosts [Default: %default]')
+    parser.add_option('-s', '--seed', dest='seed', type='int', default=0, help='Random seed [Default: %default]')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
+if __name__ == '__main__':
+    import sys
+    options = readCommand(sys.argv[1:])
+    print(generateLayout(options.kind, options.width, options.height, options.foodDensity,
+                         options.braidFraction, options.roomSize, options.numGhosts, options.seed))
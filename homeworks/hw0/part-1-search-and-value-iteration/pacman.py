@@ -43,9 +43,11 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import Configuration
 from util import nearestPoint
 from util import manhattanDistance
 import util, layout
+import searchStats
 import sys, types, time, random, os
 import valueIterationAgents
 
@@ -72,19 +74,21 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
-    explored = set()
     def getAndResetExplored():
-        tmp = GameState.explored.copy()
-        GameState.explored = set()
-        return tmp
+        """
+        Returns the sample of explored states kept by the active Instrumentation
+        (see instrument below) and starts a new sample.  Without instrumentation
+        nothing is recorded and this returns an empty set.
+        """
+        if _INSTRUMENTATION is None: return set()
+        return _INSTRUMENTATION.resetSample()
     getAndResetExplored = staticmethod(getAndResetExplored)
 
     def getLegalActions( self, agentIndex=0 ):
         """
         Returns the legal actions for the agent specified.
         """
-#        GameState.explored.add(self)
+        if _INSTRUMENTATION is not None: _INSTRUMENTATION.recordLegalActions( agentIndex )
         if self.isWin() or self.isLose(): return []
 
         if agentIndex == 0:  # Pacman is moving
@@ -121,8 +125,8 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        state.data.updateHash( self.data, agentIndex )
+        if _INSTRUMENTATION is not None: _INSTRUMENTATION.recordSuccessor( self, state, agentIndex )
         return state
 
     def getLegalPacmanActions( self ):
@@ -175,7 +179,7 @@ class GameState:
         return self.data.capsules
 
     def getNumFood( self ):
-        return self.data.food.count()
+        return self.data.getNumFood()
 
     def getFood(self):
         """
@@ -232,6 +236,16 @@ class GameState:
         state.data = self.data.deepCopy()
         return state
 
+    def observationView( self ):
+        """
+        Returns a read-only copy of this state that shares the layout and food
+        with it, for agents to observe instead of a deepCopy.  Successors of
+        the view can be generated as usual.
+        """
+        view = GameState()
+        view.data = self.data.observationCopy()
+        return view
+
     def __eq__( self, other ):
         """
         Allows two states to be compared.
@@ -254,6 +268,79 @@ class GameState:
         """
         self.data.initialize(layout, numGhostAgents)
 
+class Instrumentation:
+    """
+    Cheap counters describing how agents use GameStates: successors generated,
+    legal-action queries and expansions (successors generated) per agent.
+
+    If sampleSize > 0, a uniform random sample of at most sampleSize explored
+    states is also kept (reservoir sampling), so memory stays bounded however
+    many games are played.  Instrumentation is off unless enabled with the
+    instrument context manager:
+
+    with pacman.instrument(sampleSize=100) as stats:
+        runGames(**args)
+    print(stats.successorsGenerated, stats.expansions)
+    """
+    def __init__( self, sampleSize=0 ):
+        self.successorsGenerated = 0
+        self.legalActionQueries = 0
+        self.expansions = util.Counter() # agentIndex -> successors generated
+        self.sampleSize = sampleSize
+        self.sample = []
+        self.statesSeen = 0
+        self.random = random.Random(0) # private, so the game's random stream is untouched
+
+    def recordLegalActions( self, agentIndex ):
+        self.legalActionQueries += 1
+
+    def recordSuccessor( self, parent, child, agentIndex ):
+        self.successorsGenerated += 1
+        self.expansions[agentIndex] += 1
+        if self.sampleSize > 0:
+            self._sampleState( parent )
+            self._sampleState( child )
+
+    def _sampleState( self, state ):
+        self.statesSeen += 1
+        if len( self.sample ) < self.sampleSize:
+            self.sample.append( state )
+        else:
+            i = self.random.randrange( self.statesSeen )
+            if i < self.sampleSize: self.sample[i] = state
+
+    def resetSample( self ):
+        sample = set( self.sample )
+        self.sample = []
+        self.statesSeen = 0
+        return sample
+
+    def __str__( self ):
+        perAgent = ', '.join( ['%d: %d' % (i, self.expansions[i]) for i in sorted( self.expansions )] )
+        return 'Successors generated: %d\nLegal action queries: %d\nExpansions per agent: %s' % \
+            (self.successorsGenerated, self.legalActionQueries, perAgent or 'none')
+
+_INSTRUMENTATION = None
+
+class instrument:
+    """
+    Context manager that turns on an Instrumentation for the enclosed code and
+    turns it off (restoring any outer one) on exit.
+    """
+    def __init__( self, sampleSize=0 ):
+        self.stats = Instrumentation( sampleSize )
+
+    def __enter__( self ):
+        global _INSTRUMENTATION
+        self.outer = _INSTRUMENTATION
+        _INSTRUMENTATION = self.stats
+        return self.stats
+
+    def __exit__( self, *excInfo ):
+        global _INSTRUMENTATION
+        _INSTRUMENTATION = self.outer
+        return False
+
 ############################################################################
 #                     THE HIDDEN SECRETS OF PACMAN                         #
 #                                                                          #
@@ -272,11 +359,11 @@ class ClassicGameRules:
     def __init__(self, timeout=30):
         self.timeout = timeout
 
-    def newGame( self, layout, pacmanAgent, ghostAgents, display, quiet = False, catchExceptions=False):
+    def newGame( self, layout, pacmanAgent, ghostAgents, display, quiet = False, catchExceptions=False, observationViews=False):
         agents = [pacmanAgent] + ghostAgents[:layout.getNumGhosts()]
         initState = GameState()
         initState.initialize( layout, len(ghostAgents) )
-        game = Game(agents, display, self, catchExceptions=catchExceptions)
+        game = Game(agents, display, self, catchExceptions=catchExceptions, observationViews=observationViews)
         game.state = initState
         self.initialState = initState.deepCopy()
         self.quiet = quiet
@@ -330,9 +417,13 @@ class PacmanRules:
 
     def getLegalActions( state ):
         """
-        Returns a list of possible actions.
+        Returns a list of possible actions, looked up in the layout's
+        CompiledLayout while pacman is on a grid point.
         """
-        return Actions.getPossibleActions( state.getPacmanState().configuration, state.data.layout.walls )
+        conf = state.getPacmanState().configuration
+        if conf.isInteger():
+            return state.data.layout.getCompiledLayout().getLegalActions( conf.pos )
+        return Actions.getPossibleActions( conf, state.data.layout.walls )
     getLegalActions = staticmethod( getLegalActions )
 
     def applyAction( state, action ):
@@ -362,10 +453,8 @@ class PacmanRules:
         # Eat food
         if state.data.food[x][y]:
             state.data.scoreChange += 10
-            state.data.food = state.data.food.copy()
-            state.data.food[x][y] = False
+            state.data.eatFood( position )
             state.data._foodEaten = position
-            # TODO: cache numFood?
             numFood = state.getNumFood()
             if numFood == 0 and not state.data._lose:
                 state.data.scoreChange += 500
@@ -415,7 +504,9 @@ class GhostRules:
     def decrementTimer( ghostState):
         timer = ghostState.scaredTimer
         if timer == 1:
-            ghostState.configuration.pos = nearestPoint( ghostState.configuration.pos )
+            # Replace rather than edit the configuration: it is shared with the predecessor state
+            conf = ghostState.configuration
+            ghostState.configuration = Configuration( nearestPoint( conf.pos ), conf.direction )
         ghostState.scaredTimer = max( 0, timer - 1 )
     decrementTimer = staticmethod( decrementTimer )
 
@@ -526,6 +617,12 @@ def readCommand( argv ):
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
     parser.add_option('-i', '--iterations',action='store', type='int', dest='iters', default=100,
                       help='Number of rounds of value iteration (default %default)')
+    parser.add_option('--instrument', action='store_true', dest='instrument',
+                      help='Count successors generated and legal action queries, and print them after the games', default=False)
+    parser.add_option('--searchStats', dest='searchStats', metavar='FILE', default=None,
+                      help='Profile every search run by search agents and write the statistics as JSON to FILE (- for standard output)')
+    parser.add_option('--workers', dest='workers', type='int',
+                      help=default('Number of processes to play games in; more than 1 plays headless (no graphics) and seeds each game separately'), default=1)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -583,6 +680,10 @@ def readCommand( argv ):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['instrumentGames'] = options.instrument
+    args['workers'] = options.workers
+    args['searchStatsFile'] = options.searchStats
+    if options.fixRandomSeed: args['seed'] = 'cs188'
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
@@ -638,7 +739,36 @@ def replayGame( layout, actions, display ):
 
     display.finish()
 
-def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30 ):
+def recordGame( index, layout, game ):
+    import time, pickle
+    fname = ('recorded-game-%d' % (index + 1)) +  '-'.join([str(t) for t in time.localtime()[1:6]])
+    f = open(fname, 'wb')
+    components = {'layout': layout, 'actions': game.moveHistory}
+    pickle.dump(components, f)
+    f.close()
+
+def printSummary( scores, wins ):
+    winRate = wins.count(True)/ float(len(wins))
+    print('Average Score:', sum(scores) / float(len(scores)))
+    print('Scores:       ', ', '.join([str(score) for score in scores]))
+    print('Win Rate:      %d/%d (%.2f)' % (wins.count(True), len(wins), winRate))
+    print('Record:       ', ', '.join([ ['Loss', 'Win'][int(w)] for w in wins]))
+
+def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30, instrumentGames=False, workers=1, seed=None, searchStatsFile=None ):
+    if searchStatsFile is not None:
+        with searchStats.record() as recorder:
+            games = runGames( layout, pacman, ghosts, display, numGames, record, numTraining, catchExceptions, timeout, instrumentGames, workers, seed )
+        searchStats.dump( recorder.stats, searchStatsFile )
+        if searchStatsFile != '-': print('Statistics of %d searches written to %s' % (len( recorder.stats ), searchStatsFile))
+        return games
+    if workers > 1:
+        return runGamesInParallel( layout, pacman, ghosts, numGames, record, numTraining, catchExceptions, timeout, instrumentGames, workers, seed )
+    if instrumentGames:
+        with instrument() as stats:
+            games = runGames( layout, pacman, ghosts, display, numGames, record, numTraining, catchExceptions, timeout )
+        print(stats)
+        return games
+
     import __main__
     __main__.__dict__['_display'] = display
 
@@ -660,24 +790,104 @@ def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0
         if not beQuiet: games.append(game)
 
         if record:
-            import time, pickle
-            fname = ('recorded-game-%d' % (i + 1)) +  '-'.join([str(t) for t in time.localtime()[1:6]])
-            f = open(fname, 'wb')
-            components = {'layout': layout, 'actions': game.moveHistory}
-            pickle.dump(components, f)
-            f.close()
+            recordGame( i, layout, game )
 
     if (numGames-numTraining) > 0:
         scores = [game.state.getScore() for game in games]
         wins = [game.state.isWin() for game in games]
-        winRate = wins.count(True)/ float(len(wins))
-        print('Average Score:', sum(scores) / float(len(scores)))
-        print('Scores:       ', ', '.join([str(score) for score in scores]))
-        print('Win Rate:      %d/%d (%.2f)' % (wins.count(True), len(wins), winRate))
-        print('Record:       ', ', '.join([ ['Loss', 'Win'][int(w)] for w in wins]))
+        printSummary( scores, wins )
 
     return games
 
+_BATCH = None # What each worker process of runGamesInParallel plays
+
+def _initBatchWorker( batch ):
+    global _BATCH
+    _BATCH = batch
+
+def _playBatchGame( index ):
+    """
+    Plays game number 'index' of a parallel batch headless and returns a
+    small summary of it instead of the Game object.
+    """
+    import textDisplay
+    layout, pacman, ghosts, record, catchExceptions, timeout, instrumentGames, seed = _BATCH
+    # Each game gets its own seed, so results do not depend on scheduling
+    if seed is None: random.seed()
+    else: random.seed('%s-%d' % (seed, index))
+    rules = ClassicGameRules(timeout)
+    game = rules.newGame( layout, pacman, ghosts, textDisplay.NullGraphics(), True, catchExceptions )
+    recorder = searchStats.record() if searchStats.isRecording() else _noInstrumentation()
+    with recorder, instrument() if instrumentGames else _noInstrumentation() as stats:
+        game.run()
+    if record:
+        recordGame( index, layout, game )
+    result = {'index': index,
+              'score': game.state.getScore(),
+              'win': game.state.isWin(),
+              'moves': len( game.moveHistory ),
+              'agentTimes': game.totalAgentTimes,
+              'crashed': game.agentCrashed}
+    if stats is not None:
+        result['instrumentation'] = (stats.successorsGenerated, stats.legalActionQueries, dict( stats.expansions ))
+    if isinstance( recorder, searchStats.record ):
+        result['searchStats'] = recorder.stats
+    return result
+
+class _noInstrumentation:
+    def __enter__( self ): return None
+    def __exit__( self, *excInfo ): return False
+
+def runGamesInParallel( layout, pacman, ghosts, numGames, record, numTraining = 0, catchExceptions=False, timeout=30, instrumentGames=False, workers=2, seed=None ):
+    """
+    Plays numGames headless games across a pool of worker processes.
+
+    Game i is seeded with seed and i (or randomly if seed is None), so a
+    batch gives the same games with any number of workers above one.  These
+    are not the games runGames plays with a single worker, which seeds the
+    random module once (with -f) and lets later games continue its sequence,
+    as it always has.  Each worker sends
+    back the score, outcome, number of moves and agent times of its games,
+    which are printed as they arrive and summarized like runGames does.
+    Full Game objects are not kept; the per-game summaries are returned,
+    ordered by game index.
+
+    Agents are copied into every worker, so learning agents cannot share
+    what they learn and training games are not supported.
+    """
+    import multiprocessing
+    if numTraining > 0:
+        raise Exception('Training games cannot be played with more than one worker')
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork') # agents need not be picklable
+    else:
+        context = multiprocessing.get_context()
+    batch = (layout, pacman, ghosts, record, catchExceptions, timeout, instrumentGames, seed)
+
+    results = [None] * numGames
+    pool = context.Pool( workers, _initBatchWorker, (batch,) )
+    try:
+        for result in pool.imap_unordered( _playBatchGame, range( numGames ) ):
+            results[result['index']] = result
+            print('Game %d: %s, Score: %d, Moves: %d' % (result['index'] + 1, ['Loss', 'Win'][int(result['win'])], result['score'], result['moves']))
+    finally:
+        pool.terminate()
+        pool.join()
+
+    if numGames > 0:
+        printSummary( [r['score'] for r in results], [r['win'] for r in results] )
+    for r in results:
+        searchStats.report( r.get( 'searchStats', [] ) )
+    if instrumentGames:
+        stats = Instrumentation()
+        for r in results:
+            successors, queries, expansions = r['instrumentation']
+            stats.successorsGenerated += successors
+            stats.legalActionQueries += queries
+            for agentIndex, count in expansions.items(): stats.expansions[agentIndex] += count
+        print(stats)
+    return results
+
 
 def runValueIteration( layout, pacman, ghosts, display, catchExceptions=False):
     import __main__
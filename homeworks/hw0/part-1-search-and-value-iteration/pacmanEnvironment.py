@@ -0,0 +1,105 @@
+# pacmanEnvironment.py
+# --------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Pacman as an environment.Environment, for learning agents that want to drive
+the game one pacman move at a time instead of through Game.run.
+
+PacmanEnvironment plays a single game with GameStates and ghost agents.
+VectorPacmanEnvironment plays many games of one layout per call on top of
+vectorPacman.LockstepSimulator, with random ghosts, and starts a new game
+as soon as one ends.
+"""
+
+from environment import Environment
+from vectorPacman import LockstepSimulator, RUNNING
+import ghostAgents
+import pacman
+import random
+
+class PacmanEnvironment(Environment):
+    """
+    A single game in which the learner controls pacman.  Each action is one
+    pacman move followed by one move of every ghost; the reward is the change
+    in score.
+    """
+
+    def __init__(self, layout, ghosts=None):
+        self.layout = layout
+        if ghosts is None:
+            ghosts = [ghostAgents.RandomGhost(i + 1) for i in range(layout.getNumGhosts())]
+        self.ghostAgents = ghosts
+        self.reset()
+
+    def getCurrentState(self):
+        return self.state
+
+    def getPossibleActions(self, state):
+        return state.getLegalActions(0)
+
+    def doAction(self, action):
+        state = self.state.generateSuccessor(0, action)
+        for ghost in self.ghostAgents[:state.getNumAgents() - 1]:
+            if state.isWin() or state.isLose(): break
+            state = state.generateSuccessor(ghost.index, ghost.getAction(state))
+        reward = state.getScore() - self.state.getScore()
+        self.state = state
+        return (reward, state)
+
+    def reset(self):
+        self.state = pacman.GameState()
+        self.state.initialize(self.layout, len(self.ghostAgents))
+
+class VectorPacmanEnvironment(Environment):
+    """
+    numGames independent games of one layout, stepped together.
+
+    The current state is the LockstepSimulator itself.  doAction takes one
+    pacman action per game and returns the batched (rewards, terminals);
+    games that end are reported as terminal once and reset in place, so every
+    game always has legal actions.  Ghosts choose uniformly among their legal
+    actions, like ghostAgents.RandomGhost, from a private random stream.
+    """
+
+    def __init__(self, layout, numGames, seed=None):
+        self.simulator = LockstepSimulator(layout, numGames)
+        self.numGames = numGames
+        self.random = random.Random(seed)
+        self.episodes = 0
+
+    def getCurrentState(self):
+        return self.simulator
+
+    def getPossibleActions(self, state):
+        return state.getLegalActions(0)
+
+    def doAction(self, actions):
+        sim, choice = self.simulator, self.random.choice
+        rewards = list(sim.step(0, actions))
+        for agentIndex in range(1, sim.numAgents):
+            ghostActions = [choice(legal) if legal else None for legal in sim.getLegalActions(agentIndex)]
+            for k, change in enumerate(sim.step(agentIndex, ghostActions)):
+                rewards[k] += change
+        terminals = [status != RUNNING for status in sim.status]
+        for k in range(self.numGames):
+            if terminals[k]:
+                sim.resetGame(k)
+                self.episodes += 1
+        return (rewards, terminals)
+
+    def reset(self):
+        self.simulator.reset()
+
+    def isTerminal(self):
+        return False # finished games are reset by doAction
@@ -19,6 +19,7 @@ Pacman agents (in searchAgents.py).
 
 import util
 from game import Directions
+from game import Actions
 from typing import List
 
 class SearchProblem:
@@ -106,7 +107,13 @@ def breadthFirstSearch(problem: SearchProblem) -> List[Directions]:
     util.raiseNotDefined()
 
 def uniformCostSearch(problem: SearchProblem) -> List[Directions]:
-    """Search the node of least total cost first."""
+    """
+    Search the node of least total cost first.
+
+    util.BucketQueue is a drop-in replacement for util.PriorityQueue that is
+    much faster when step costs are small integers, and switches itself to a
+    binary heap as soon as it sees a cost that is not.
+    """
     "*** YOUR CODE HERE ***"
     util.raiseNotDefined()
 
@@ -118,12 +125,931 @@ def nullHeuristic(state, problem=None) -> float:
     return 0
 
 def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic) -> List[Directions]:
-    """Search the node that has the lowest combined cost and heuristic first."""
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+
+    As in uniformCostSearch, util.BucketQueue picks the bucket frontier on its
+    own when costs and heuristic values are small integers.
+    """
     "*** YOUR CODE HERE ***"
     util.raiseNotDefined()
 
+def _watchFrontier(problem, frontier):
+    """
+    Returns a util queue frontier, wrapped to time its operations and track
+    its size while searchStats profiles the search.
+    """
+    watch = getattr(problem, 'watchFrontier', None)
+    return frontier if watch is None else watch(frontier)
+
+def _frontierRecorder(problem):
+    """
+    Returns the function a search with its own frontier (a heap or a list)
+    reports the frontier size to while searchStats profiles the search, or
+    None.
+    """
+    return getattr(problem, 'recordFrontier', None)
+
+def _goalState(problem):
+    "The single goal of a problem searched from both ends"
+    if hasattr(problem, 'getGoalState'): return problem.getGoalState()
+    if hasattr(problem, 'goal'): return problem.goal
+    raise Exception('Bidirectional search needs a problem with a single goal (getGoalState)')
+
+def _predecessors(problem, state):
+    """
+    Returns (predecessor, action, stepCost) triples, where action leads from
+    the predecessor to state.  Problems without getPredecessors must have
+    reversible moves with symmetric costs.
+    """
+    if hasattr(problem, 'getPredecessors'): return problem.getPredecessors(state)
+    return [(next, Directions.REVERSE[action], cost) for next, action, cost in problem.getSuccessors(state)]
+
+def _joinPaths(meet, forwardParents, backwardParents):
+    """
+    Follows forward parents (state -> (previous state, action)) back to the
+    start and backward parents (state -> (next state, action)) on to the goal.
+    """
+    actions = []
+    state = meet
+    while forwardParents[state] is not None:
+        state, action = forwardParents[state]
+        actions.append(action)
+    actions.reverse()
+    state = meet
+    while backwardParents[state] is not None:
+        state, action = backwardParents[state]
+        actions.append(action)
+    return actions
+
+class _ReversedProblem:
+    """
+    A problem seen from its goal: the start and goal are swapped, so that a
+    heuristic estimating the distance to problem.goal estimates the distance
+    to the start instead.  Other attributes are read from the problem.
+    """
+    def __init__(self, problem):
+        self.problem = problem
+        self.startState = _goalState(problem)
+        self.goal = problem.getStartState()
+
+    def getStartState(self):
+        return self.startState
+
+    def getGoalState(self):
+        return self.goal
+
+    def isGoalState(self, state):
+        return state == self.goal
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+def bidirectionalBreadthFirstSearch(problem: SearchProblem) -> List[Directions]:
+    """
+    Breadth first search from the start and the goal at once, for problems
+    with a single goal (getGoalState) and unit step costs.  Each round
+    expands one whole layer of the smaller frontier; once the frontiers meet,
+    the shortest path through any meeting state of that layer is returned.
+
+    Predecessors come from problem.getPredecessors if it exists, otherwise
+    moves are assumed reversible (see _predecessors).
+    """
+    start, goal = problem.getStartState(), _goalState(problem)
+    if problem.isGoalState(start): return []
+    parents = ({start: None}, {goal: None})
+    depths = ({start: 0}, {goal: 0})
+    layers = ([start], [goal])
+    record = _frontierRecorder(problem)
+    while layers[0] and layers[1]:
+        if record: record(len(layers[0]) + len(layers[1]))
+        side = 0 if len(layers[0]) <= len(layers[1]) else 1
+        seen, otherDepths = depths[side], depths[1 - side]
+        best, meet, nextLayer = None, None, []
+        for state in layers[side]:
+            moves = problem.getSuccessors(state) if side == 0 else _predecessors(problem, state)
+            for next, action, cost in moves:
+                if next in seen: continue
+                seen[next] = seen[state] + 1
+                parents[side][next] = (state, action)
+                nextLayer.append(next)
+                if next in otherDepths and (best is None or seen[next] + otherDepths[next] < best):
+                    best, meet = seen[next] + otherDepths[next], next
+        if meet is not None:
+            problem.isGoalState(goal) # lets the problem display its expanded states
+            return _joinPaths(meet, parents[0], parents[1])
+        layers = (nextLayer, layers[1]) if side == 0 else (layers[0], nextLayer)
+    return []
+
+def bidirectionalAStarSearch(problem: SearchProblem, heuristic=nullHeuristic) -> List[Directions]:
+    """
+    A* from the start towards the goal and from the goal towards the start,
+    for problems with a single goal (getGoalState).  Both searches use front
+    to end heuristics: heuristic(state, problem) forwards, and the same
+    heuristic on the problem with start and goal swapped backwards.
+
+    Each step expands the direction with the smaller frontier.  The search
+    stops once the best path found through a state reached from both ends
+    costs no more than the larger of the two smallest frontier priorities,
+    which no remaining path can beat if the heuristic is admissible.  With
+    nullHeuristic this is bidirectional uniform cost search.
+    """
+    start, goal = problem.getStartState(), _goalState(problem)
+    if problem.isGoalState(start): return []
+    reversedProblem = _ReversedProblem(problem)
+    estimate = (lambda state: heuristic(state, problem), lambda state: heuristic(state, reversedProblem))
+    costs = ({start: 0}, {goal: 0})
+    parents = ({start: None}, {goal: None})
+    frontiers = (_watchFrontier(problem, util.BucketQueue()), _watchFrontier(problem, util.BucketQueue()))
+    frontiers[0].push(start, estimate[0](start))
+    frontiers[1].push(goal, estimate[1](goal))
+    best, meet = float('inf'), None
+    while not frontiers[0].isEmpty() and not frontiers[1].isEmpty():
+        if best <= max(frontiers[0].peekPriority(), frontiers[1].peekPriority()): break
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        state = frontiers[side].pop()
+        cost, otherCosts = costs[side], costs[1 - side]
+        moves = problem.getSuccessors(state) if side == 0 else _predecessors(problem, state)
+        for next, action, stepCost in moves:
+            nextCost = cost[state] + stepCost
+            if next in cost and cost[next] <= nextCost: continue
+            cost[next] = nextCost
+            parents[side][next] = (state, action)
+            if next in otherCosts and nextCost + otherCosts[next] < best:
+                best, meet = nextCost + otherCosts[next], next
+            priority = nextCost + estimate[side](next)
+            if priority < best:
+                frontiers[side].update(next, priority)
+    if meet is None: return []
+    problem.isGoalState(goal) # lets the problem display its expanded states
+    return _joinPaths(meet, parents[0], parents[1])
+
+def jumpPointSearch(problem: SearchProblem) -> List[Directions]:
+    """
+    Jump Point Search for 4-connected grids: A* with the Manhattan distance
+    that, instead of adding every neighbor to the frontier, jumps in a
+    straight line until it reaches a state where the best path may turn.
+    Only those jump points are expanded, so the many equivalent paths
+    across open areas are never generated.
+
+    Jumps follow the 4-connected rules: a vertical jump stops at the goal
+    or next to a forced neighbor (an open side cell whose cell behind is a
+    wall); a horizontal jump also stops where a vertical jump from it would
+    stop.  Expanded jump points count towards problem._expanded.
+
+    The problem must be a PositionSearchProblem (walls, goal) with unit step
+    costs.  Returns the same kind of action list as aStarSearch.
+    """
+    walls, goal = problem.walls, problem.goal
+    width, height = walls.width, walls.height
+    start = problem.getStartState()
+    if problem.isGoalState(start): return []
+
+    def isOpen(x, y):
+        return 0 <= x < width and 0 <= y < height and not walls[x][y]
+
+    def jumpVertical(x, y, dy):
+        while True:
+            y += dy
+            if not isOpen(x, y): return None
+            if (x, y) == goal: return (x, y)
+            if (isOpen(x + 1, y) and not isOpen(x + 1, y - dy)) or (isOpen(x - 1, y) and not isOpen(x - 1, y - dy)):
+                return (x, y)
+
+    def jumpHorizontal(x, y, dx):
+        while True:
+            x += dx
+            if not isOpen(x, y): return None
+            if (x, y) == goal: return (x, y)
+            if (isOpen(x, y + 1) and not isOpen(x - dx, y + 1)) or (isOpen(x, y - 1) and not isOpen(x - dx, y - 1)):
+                return (x, y)
+            if jumpVertical(x, y, 1) or jumpVertical(x, y, -1): return (x, y)
+
+    def directionsFrom(state, arrival):
+        """
+        The directions worth jumping in from state, given the unit vector it
+        was reached by (None at the start).
+        """
+        if arrival is None: return [(1, 0), (-1, 0), (0, 1), (0, -1)]
+        x, y = state
+        dx, dy = arrival
+        if dy == 0: return [(dx, 0), (0, 1), (0, -1)]
+        directions = [(0, dy)]
+        for side in (1, -1):
+            if isOpen(x + side, y) and not isOpen(x + side, y - dy): directions.append((side, 0))
+        return directions
+
+    def estimate(state):
+        return abs(state[0] - goal[0]) + abs(state[1] - goal[1])
+
+    costs = {start: 0}
+    parents = {start: None} # jump point -> (previous jump point, unit vector)
+    closed = set()
+    frontier = _watchFrontier(problem, util.BucketQueue())
+    frontier.push(start, estimate(start))
+    while not frontier.isEmpty():
+        state = frontier.pop()
+        if state == goal: break
+        closed.add(state)
+        problem._expanded += 1 # Bookkeeping, as in getSuccessors
+        if state not in problem._visited:
+            problem._visited[state] = True
+            problem._visitedlist.append(state)
+        arrival = parents[state][1] if parents[state] else None
+        for dx, dy in directionsFrom(state, arrival):
+            if dy == 0: jump = jumpHorizontal(state[0], state[1], dx)
+            else: jump = jumpVertical(state[0], state[1], dy)
+            if jump is None or jump in closed: continue
+            cost = costs[state] + abs(jump[0] - state[0]) + abs(jump[1] - state[1])
+            if jump in costs and costs[jump] <= cost: continue
+            costs[jump] = cost
+            parents[jump] = (state, (dx, dy))
+            frontier.update(jump, cost + estimate(jump))
+    if goal not in parents: return []
+
+    # Expand each straight jump into single moves
+    actions = []
+    state = goal
+    while parents[state] is not None:
+        previous, vector = parents[state]
+        steps = abs(state[0] - previous[0]) + abs(state[1] - previous[1])
+        actions.extend([Actions.vectorToDirection(vector)] * steps)
+        state = previous
+    actions.reverse()
+    problem.isGoalState(goal) # lets the problem display its expanded states
+    return actions
+
+def _nodeTableSearch(problem, makeFrontier, reopen=False):
+    """
+    Graph search over a util.SearchNodeTable: the frontier holds node
+    indices and goals are tested when nodes are popped.  makeFrontier(table)
+    returns an empty frontier.
+
+    Without reopen, a state is expanded once.  With reopen (for frontiers
+    ordered by path cost), only successors that improve on the cheapest
+    path to their state are added, and a state is expanded again whenever
+    it is reached at a lower path cost, which an inconsistent heuristic
+    allows.
+    """
+    table = util.SearchNodeTable()
+    frontier = _watchFrontier(problem, makeFrontier(table))
+    frontier.push(table.addNode(problem.getStartState()))
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        state = table.getState(node)
+        cost = table.getCost(node)
+        if table.isClosed(state, cost if reopen else None): continue
+        table.close(node)
+        if problem.isGoalState(state): return table.getPath(node)
+        for next, action, stepCost in problem.getSuccessors(state):
+            nextCost = cost + stepCost
+            if reopen:
+                if nextCost < table.getBestCost(next):
+                    frontier.push(table.addNode(next, node, action, nextCost))
+            elif not table.isClosed(next):
+                frontier.push(table.addNode(next, node, action, nextCost))
+    return []
+
+def compactDepthFirstSearch(problem: SearchProblem) -> List[Directions]:
+    "Depth first graph search that stores its nodes in a util.SearchNodeTable"
+    return _nodeTableSearch(problem, lambda table: util.Stack())
+
+def compactBreadthFirstSearch(problem: SearchProblem) -> List[Directions]:
+    "Breadth first graph search that stores its nodes in a util.SearchNodeTable"
+    return _nodeTableSearch(problem, lambda table: util.Queue())
+
+def compactUniformCostSearch(problem: SearchProblem) -> List[Directions]:
+    """
+    Uniform cost graph search that stores its nodes in a util.SearchNodeTable.
+    The frontier is a util.BucketQueue, which falls back to a heap for costs
+    that are not small integers.
+    """
+    return _nodeTableSearch(problem, lambda table: util.BucketQueueWithFunction(table.getCost), reopen=True)
+
+def compactAStarSearch(problem: SearchProblem, heuristic=nullHeuristic) -> List[Directions]:
+    "A* graph search that stores its nodes in a util.SearchNodeTable, with a util.BucketQueue frontier"
+    return _nodeTableSearch(problem, lambda table: util.BucketQueueWithFunction(
+        lambda node: table.getCost(node) + heuristic(table.getState(node), problem)), reopen=True)
+
+MAX_NODES = 100000 # Default memory budget of the memory-bounded searches, in search nodes
+
+def iterativeDeepeningAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, maxNodes=MAX_NODES) -> List[Directions]:
+    """
+    IDA*: depth first searches that cut off every path whose f = g + h
+    exceeds a bound, starting from h(start) and raising the bound to the
+    smallest f that was cut off until a goal is found.  With an admissible
+    heuristic the path is optimal.
+
+    Memory is the current path plus a transposition table (state -> lowest g
+    reached in this iteration) of at most maxNodes states, which stops the
+    search from exploring a state again on a path that is no cheaper.  Once
+    the table is full, new states are only checked against the current path.
+    The frontier size reported to searchStats is the depth of the path.
+    """
+    record = _frontierRecorder(problem)
+    start = problem.getStartState()
+    if problem.isGoalState(start): return []
+    bound = heuristic(start, problem)
+    while True:
+        table = {start: 0}
+        path, onPath, actions = [start], set([start]), []
+        nextBound = float('inf')
+
+        def children(state, cost):
+            "The successors worth visiting, lowest f first"
+            found = []
+            for next, action, stepCost in problem.getSuccessors(state):
+                g = cost + stepCost
+                if next in onPath or table.get(next, g + 1) <= g: continue
+                found.append((g + heuristic(next, problem), g, next, action))
+            found.sort(key=lambda child: child[0])
+            return iter(found)
+
+        stack = [children(start, 0)]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                onPath.discard(path.pop())
+                if actions: actions.pop()
+                continue
+            f, g, state, action = child
+            if f > bound:
+                # Children come lowest f first, so the rest are cut off too
+                nextBound = min(nextBound, f)
+                stack[-1] = iter(())
+                continue
+            if state in onPath or table.get(state, g + 1) <= g: continue
+            if state in table or len(table) < maxNodes: table[state] = g
+            actions.append(action)
+            if problem.isGoalState(state): return actions
+            path.append(state)
+            onPath.add(state)
+            stack.append(children(state, g))
+            if record: record(len(stack))
+        if nextBound == float('inf'): return []
+        bound = nextBound
+
+class _BoundedNode:
+    """
+    A search node of simplifiedMemoryBoundedAStarSearch.  successors is None
+    until the node is expanded; then children[i] is the node of successor i
+    while it is in memory, and childF[i] its f value, kept when the child is
+    forgotten (None if it was never generated).
+    """
+    __slots__ = ('state', 'parent', 'slot', 'action', 'g', 'f', 'depth', 'successors', 'children', 'childF', 'live')
+
+    def __init__(self, state, parent, slot, action, g, f):
+        self.state, self.parent, self.slot, self.action, self.g, self.f = state, parent, slot, action, g, f
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.successors = self.children = self.childF = None
+        self.live = 0 # children in memory
+
+    def canGenerate(self):
+        "True if a successor of this node may still be (re)generated"
+        if self.successors is None: return True
+        inf = float('inf')
+        return any(child is None and (f is None or f < inf) for child, f in zip(self.children, self.childF))
+
+def simplifiedMemoryBoundedAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, maxNodes=MAX_NODES) -> List[Directions]:
+    """
+    SMA*: A* that keeps at most maxNodes search nodes in memory.
+
+    The lowest f node (deepest on ties) generates one successor at a time.
+    When memory is full, the highest f leaf (shallowest on ties) is
+    forgotten and its parent remembers its f, so the subtree is only
+    generated again once it is the best option left.  A node's f is raised
+    to the lowest f of its successors once they have all been generated.
+    Successors that reach a state in memory at no lower cost are skipped.
+
+    With an admissible heuristic the path is optimal if the optimal solution
+    is shorter than maxNodes moves; otherwise the best solution that fits is
+    returned, or no path at all.
+    """
+    inf = float('inf')
+    start = problem.getStartState()
+    root = _BoundedNode(start, None, None, None, 0, heuristic(start, problem))
+    best = {start: root} # state -> lowest g node in memory
+    used = 1
+    frontier = _watchFrontier(problem, util.PriorityQueue()) # nodes that can generate, by (f, -depth)
+    leaves = util.PriorityQueue()   # nodes without children in memory, by (-f, depth)
+
+    def refresh(node):
+        "Files the node in frontier and leaves according to its state"
+        if node in frontier: frontier.remove(node)
+        if node.f < inf and node.canGenerate(): frontier.push(node, (node.f, -node.depth))
+        if node in leaves: leaves.remove(node)
+        if node.parent is not None and node.live == 0: leaves.push(node, (-node.f, node.depth))
+
+    def backup(node):
+        "Raises the f of fully generated nodes to the lowest f of their successors"
+        while node is not None and node.successors is not None and None not in node.childF:
+            f = min(node.childF) if node.childF else inf
+            if f <= node.f: break
+            node.f = f
+            if node.parent is not None: node.parent.childF[node.slot] = f
+            refresh(node)
+            node = node.parent
+
+    def forget(leaf):
+        parent = leaf.parent
+        parent.children[leaf.slot] = None
+        parent.childF[leaf.slot] = leaf.f
+        parent.live -= 1
+        if leaf in frontier: frontier.remove(leaf)
+        if best.get(leaf.state) is leaf: del best[leaf.state]
+        refresh(parent)
+
+    refresh(root)
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        if node.successors is None:
+            if problem.isGoalState(node.state):
+                actions = []
+                while node.parent is not None:
+                    actions.append(node.action)
+                    node = node.parent
+                actions.reverse()
+                return actions
+            node.successors = problem.getSuccessors(node.state)
+            node.children = [None] * len(node.successors)
+            node.childF = [None] * len(node.successors)
+
+        # Generate a new successor, or else the forgotten one with the lowest f
+        slots = [i for i, f in enumerate(node.childF) if f is None] or \
+                sorted((i for i, child in enumerate(node.children) if child is None), key=node.childF.__getitem__)
+        if slots:
+            i = slots[0]
+            state, action, stepCost = node.successors[i]
+            g = node.g + stepCost
+            seen = best.get(state)
+            if seen is not None and seen.g <= g and seen.f < inf:
+                node.childF[i] = inf
+            else:
+                f = max(node.f, g + heuristic(state, problem), node.childF[i] or 0)
+                if node.depth + 2 >= maxNodes and not problem.isGoalState(state):
+                    f = inf # no room for the rest of a path through it
+                child = _BoundedNode(state, node, i, action, g, f)
+                node.children[i], node.childF[i] = child, f
+                node.live += 1
+                if seen is None or g < seen.g: best[state] = child
+                used += 1
+                refresh(child)
+        backup(node)
+        refresh(node)
+        while used > maxNodes:
+            forget(leaves.pop())
+            used -= 1
+    return []
+
+# Configurations of portfolioSearch by problem type: (search function,
+# heuristic in searchAgents.py or None, optimal).  optimal is True for
+# configurations whose paths are always optimal and UNIT_COSTS for breadth
+# first search, whose path is optimal if every step it generated cost the same.
+UNIT_COSTS = 'unit costs'
+PORTFOLIOS = {
+    'PositionSearchProblem': [('compactBreadthFirstSearch', None, UNIT_COSTS),
+                              ('compactAStarSearch', 'manhattanHeuristic', True),
+                              ('compactAStarSearch', 'landmarkHeuristic', True)],
+    'FoodSearchProblem': [('compactBreadthFirstSearch', None, UNIT_COSTS),
+                          ('compactUniformCostSearch', None, True),
+                          ('compactAStarSearch', 'foodHeuristic', True)],
+}
+
+class _StepCostCheck:
+    """
+    A problem that notes whether every step cost generated by a search was
+    the same.  Breadth first search expands every state fewer steps away
+    than the path it returns, so if all those steps cost the same no path
+    can be cheaper.
+    """
+    def __init__(self, problem):
+        self.problem = problem
+        self.stepCost = None
+        self.uniform = True
+
+    def getSuccessors(self, state):
+        successors = self.problem.getSuccessors(state)
+        for next, action, cost in successors:
+            if self.stepCost is None: self.stepCost = cost
+            elif cost != self.stepCost: self.uniform = False
+        return successors
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+_PORTFOLIO = None # (problem, configurations) in portfolio worker processes
+
+def _initPortfolioWorker(problem, configurations):
+    global _PORTFOLIO
+    if isinstance(problem, bytes):
+        import pickle
+        problem = pickle.loads(problem)
+    if hasattr(problem, 'visualize'): problem.visualize = False # only the parent may draw
+    _PORTFOLIO = (problem, configurations)
+
+def _runPortfolioConfiguration(index):
+    """
+    Runs configuration number index of the portfolio on the worker's copy of
+    the problem.  Returns (index, actions or None, whether the path is
+    optimal, nodes expanded, seconds, error message or None).
+    """
+    import time, searchAgents
+    problem, configurations = _PORTFOLIO
+    fn, heuristic, optimal = configurations[index]
+    expandedBefore = getattr(problem, '_expanded', 0)
+    searched = _StepCostCheck(problem) if optimal == UNIT_COSTS else problem
+    start = time.time()
+    try:
+        func = globals()[fn]
+        if heuristic is None: actions = func(searched)
+        else: actions = func(searched, heuristic=getattr(searchAgents, heuristic))
+    except SystemExit: # util.raiseNotDefined
+        return (index, None, False, 0, time.time() - start, 'not implemented')
+    except Exception as e:
+        return (index, None, False, 0, time.time() - start, '%s: %s' % (type(e).__name__, e))
+    if optimal == UNIT_COSTS: optimal = searched.uniform
+    return (index, actions, optimal, getattr(problem, '_expanded', 0) - expandedBefore, time.time() - start, None)
+
+def _describeConfiguration(configuration):
+    fn, heuristic, optimal = configuration
+    return fn if heuristic is None else '%s with %s' % (fn, heuristic)
+
+def portfolioSearch(problem: SearchProblem, configurations=None, requireOptimal=True, workers=None) -> List[Directions]:
+    """
+    Runs several search configurations on the problem at once, one per
+    worker process, and returns the path of the first one to finish.  The
+    configurations default to the PORTFOLIOS entry for the type of the
+    problem.  If requireOptimal is True, only paths known to be optimal can
+    win; if none is found, the cheapest path found is returned.  The
+    remaining workers are terminated as soon as there is a winner, which is
+    printed and counted as the problem's expanded nodes.  If no
+    configuration finds a path at all, an exception is raised.
+
+    Workers are forked where the platform allows it, so they share the
+    problem and its layout with this process; otherwise the problem is
+    pickled once and sent to each worker, and must be picklable.
+    """
+    import multiprocessing, pickle
+    if configurations is None:
+        kind = type(getattr(problem, 'problem', problem)).__name__ # searchStats wraps problems
+        if kind not in PORTFOLIOS:
+            raise Exception('No portfolio for %s; choose from %s or pass configurations' % (kind, ', '.join(sorted(PORTFOLIOS))))
+        configurations = PORTFOLIOS[kind]
+    if not configurations: raise Exception('A portfolio needs at least one search configuration')
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        shared = problem
+    else:
+        context = multiprocessing.get_context()
+        shared = pickle.dumps(problem, pickle.HIGHEST_PROTOCOL)
+
+    winner, fallback, errors = None, None, []
+    pool = context.Pool(workers or len(configurations), _initPortfolioWorker, (shared, configurations))
+    try:
+        for index, actions, optimal, expanded, seconds, error in pool.imap_unordered(_runPortfolioConfiguration, range(len(configurations))):
+            if actions is None:
+                errors.append('%s failed (%s)' % (_describeConfiguration(configurations[index]), error))
+                continue
+            result = (index, actions, optimal, expanded, seconds)
+            if optimal or not requireOptimal:
+                winner = result
+                break
+            if fallback is None or problem.getCostOfActions(actions) < problem.getCostOfActions(fallback[1]):
+                fallback = result
+    finally:
+        pool.terminate() # cancels the configurations still running
+        pool.join()
+    for error in errors: print('[portfolio] ' + error)
+
+    if winner is None:
+        if fallback is None: raise Exception('No configuration of the portfolio found a path')
+        print('[portfolio] No configuration found a path known to be optimal')
+        winner = fallback
+    index, actions, optimal, expanded, seconds = winner
+    optimal = ' (optimal)' if optimal else ''
+    print('[portfolio] %s won%s in %.2f seconds' % (_describeConfiguration(configurations[index]), optimal, seconds))
+    if hasattr(problem, '_expanded'): problem._expanded += expanded
+    return actions
+
+def _hdaWorker(me, problem, heuristic, inboxes, replies, counts, idle, incumbent, batchSize):
+    """
+    One process of hashDistributedAStarSearch (see _hdaSearch).  An
+    exception, or an exit such as util.raiseNotDefined's, is sent to the
+    coordinator as an 'error' reply, which it raises.
+    """
+    try:
+        _hdaSearch(me, problem, heuristic, inboxes, replies, counts, idle, incumbent, batchSize)
+    except SystemExit:
+        replies.put(('error', me, 'exited (a function it calls is not implemented?)'))
+    except BaseException as e:
+        import traceback
+        replies.put(('error', me, ''.join(traceback.format_exception_only(type(e), e)).strip()))
+
+def _hdaSearch(me, problem, heuristic, inboxes, replies, counts, idle, incumbent, batchSize):
+    """
+    Runs A* on the states that worker me owns, sends the successors it does
+    not own to their owners in batches, and answers the coordinator's
+    'report' and 'trace' requests until it is told to 'stop'.
+    """
+    import heapq
+    from queue import Empty
+    if hasattr(problem, 'visualize'): problem.visualize = False # only the parent may draw
+    numWorkers = len(inboxes)
+    best = {}     # owned state -> (g, parent state, action)
+    frontier = [] # heap of (f, -g, arrival number, state)
+    outboxes = [[] for i in range(numWorkers)]
+    arrivals = [0]
+    found = [None, 0, 0] # best (g, goal state) found here, nodes expanded, largest frontier
+
+    def receive(state, g, parent, action):
+        known = best.get(state)
+        if known is not None and known[0] <= g: return
+        best[state] = (g, parent, action)
+        heapq.heappush(frontier, (g + heuristic(state, problem), -g, arrivals[0], state))
+        arrivals[0] += 1
+        if len(frontier) > found[2]: found[2] = len(frontier)
+
+    def flush(owner):
+        if not outboxes[owner]: return
+        with counts.get_lock(): counts[0] += 1 # counted before it can be received
+        inboxes[owner].put(('nodes', outboxes[owner]))
+        outboxes[owner] = []
+
+    def handle(message):
+        "Acts on a message; returns False once told to stop"
+        if message[0] == 'nodes':
+            idle[me] = 0 # busy before the batch counts as received
+            for node in message[1]: receive(*node)
+            with counts.get_lock(): counts[1] += 1
+        elif message[0] == 'report':
+            replies.put(('report',) + tuple(found))
+        elif message[0] == 'trace':
+            g, parent, action = best[message[1]]
+            replies.put(('trace', parent, action))
+        return message[0] != 'stop'
+
+    running = True
+    while running:
+        try:
+            while running: running = handle(inboxes[me].get_nowait())
+        except Empty:
+            pass
+        expansions = 0
+        while running and frontier and expansions < batchSize:
+            f, negativeG, arrival, state = heapq.heappop(frontier)
+            g = -negativeG
+            if best[state][0] < g: continue # reached more cheaply since
+            if f >= incumbent.value:
+                del frontier[:] # nothing left here can beat the best goal
+                break
+            if problem.isGoalState(state):
+                if found[0] is None or g < found[0][0]:
+                    found[0] = (g, state)
+                    with incumbent.get_lock():
+                        if g < incumbent.value: incumbent.value = g
+                continue
+            expansions += 1
+            for next, action, stepCost in problem.getSuccessors(state):
+                owner = hash(next) % numWorkers
+                if owner == me:
+                    receive(next, g + stepCost, state, action)
+                else:
+                    outboxes[owner].append((next, g + stepCost, state, action))
+                    if len(outboxes[owner]) >= batchSize: flush(owner)
+        found[1] += expansions
+        for owner in range(numWorkers): flush(owner)
+        if running and not frontier:
+            idle[me] = 1
+            try: running = handle(inboxes[me].get(timeout=0.05))
+            except Empty: pass
+
+def hashDistributedAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, workers=None, batchSize=64) -> List[Directions]:
+    """
+    HDA*: A* spread over worker processes (by default one per CPU).  Every
+    state is owned by worker hash(state) % workers, which keeps its cost and
+    parent and expands it; successors owned by other workers are sent to
+    them through multiprocessing queues, batchSize at a time.  A worker that
+    finds a goal lowers a shared incumbent cost, and every worker drops the
+    nodes whose f cannot beat it, so the path is optimal for an admissible
+    heuristic.
+
+    If a worker fails or dies, the search raises an exception instead of
+    waiting for it.
+
+    The search is over once every worker is idle and every batch sent has
+    been received.  Sent and received batches are counted in shared
+    counters, and a worker marks itself busy before counting a batch as
+    received; so if both counts are equal, all workers look idle, and no
+    batch was sent in between, no work is left anywhere.  The path is then
+    rebuilt by asking the owner of each state for its parent.
+
+    Workers are forked where the platform allows it and share the problem
+    with this process; otherwise the problem and heuristic are pickled, and
+    states must hash the same in every process (set PYTHONHASHSEED for
+    states holding strings).
+    """
+    import multiprocessing, os, time
+    from queue import Empty
+    numWorkers = workers or os.cpu_count() or 1
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    inboxes = [context.Queue() for i in range(numWorkers)]
+    replies = context.Queue()
+    counts = context.Array('q', 2) # batches sent, batches received
+    idle = context.Array('b', numWorkers, lock=False)
+    incumbent = context.Value('d', float('inf'))
+    processes = [context.Process(target=_hdaWorker, args=(i, problem, heuristic, inboxes, replies, counts, idle, incumbent, batchSize))
+                 for i in range(numWorkers)]
+    for process in processes:
+        process.daemon = True
+        process.start()
+
+    def failed(message):
+        return Exception('HDA* worker %d failed: %s' % (message[1], message[2]))
+
+    def checkWorkers():
+        "Raises the error of a worker that has stopped running"
+        for i, process in enumerate(processes):
+            if process.is_alive(): continue
+            try: message = replies.get(timeout=1) # a failing worker sends its error before exiting
+            except Empty: message = ('error', i, 'exited with code %s' % process.exitcode)
+            if message[0] == 'error': raise failed(message)
+            raise Exception('HDA* worker %d exited with code %s' % (i, process.exitcode))
+
+    def reply(kind):
+        "The next reply of the workers, which must be of the given kind"
+        while True:
+            try:
+                message = replies.get(timeout=0.1)
+            except Empty:
+                checkWorkers()
+                continue
+            if message[0] == 'error': raise failed(message)
+            if message[0] != kind: raise Exception('HDA* expected a %s reply, got %s' % (kind, message[0]))
+            return message[1:]
+
+    try:
+        start = problem.getStartState()
+        with counts.get_lock(): counts[0] += 1
+        inboxes[hash(start) % numWorkers].put(('nodes', [(start, 0, None, None)]))
+        polls = 0
+        while True:
+            time.sleep(0.001)
+            polls += 1
+            if polls % 50 == 0: checkWorkers()
+            with counts.get_lock(): sent, received = counts[0], counts[1]
+            if sent != received or not all(idle): continue
+            with counts.get_lock(): stillSent = counts[0]
+            if stillSent == sent: break
+
+        for inbox in inboxes: inbox.put(('report',))
+        reports = [reply('report') for i in range(numWorkers)]
+        if hasattr(problem, '_expanded'): problem._expanded += sum(expanded for goal, expanded, largest in reports)
+        record = _frontierRecorder(problem)
+        if record: record(sum(largest for goal, expanded, largest in reports)) # at most this many at once
+        goals = [goal for goal, expanded, largest in reports if goal is not None]
+        if not goals: return []
+        cost, state = min(goals, key=lambda goal: goal[0])
+        actions = []
+        while True:
+            inboxes[hash(state) % numWorkers].put(('trace', state))
+            state, action = reply('trace')
+            if state is None: break
+            actions.append(action)
+        actions.reverse()
+        return actions
+    finally:
+        for inbox in inboxes: inbox.put(('stop',))
+        for process in processes:
+            process.join(1)
+            if process.is_alive(): process.terminate()
+
+ARA_INITIAL_WEIGHT = 3.0 # Heuristic weight of the first ARA* iteration
+ARA_WEIGHT_STEP = 0.5    # How much ARA* lowers the weight between iterations
+
+def anytimeRepairingAStarSearch(problem: SearchProblem, heuristic=nullHeuristic, budget=None,
+                                initialWeight=ARA_INITIAL_WEIGHT, weightStep=ARA_WEIGHT_STEP) -> List[Directions]:
+    """
+    ARA* (anytime repairing A*, Likhachev, Gordon and Thrun 2003).  A
+    weighted A* ordered by g + weight * h finds a first plan quickly; then
+    the weight is lowered by weightStep and the search goes on from where it
+    stopped, expanding again only the states whose path cost improved, until
+    the weight reaches 1 or budget seconds of wall clock time have passed.
+
+    Returns the best plan found.  The first plan is always completed, even
+    past the budget, since there is nothing to return without it.  Its
+    suboptimality bound (for an admissible heuristic, its cost is at most
+    bound times the optimal cost) is printed and left in
+    problem.suboptimalityBound.
+    """
+    import heapq, time
+    started = time.perf_counter()
+    deadline = None if budget is None else started + float(budget)
+    start = problem.getStartState()
+    costs = {start: 0}
+    parents = {start: None} # state -> (parent state, action, step cost)
+    estimates = {}          # state -> heuristic value, computed once
+    closed, inconsistent = set(), set()
+    goals = set()
+    best = [float('inf'), None] # cost and state of the best goal reached
+    frontier = []
+    arrivals = [0]
+    weight = max(1.0, initialWeight)
+    record = _frontierRecorder(problem)
+
+    def estimate(state):
+        value = estimates.get(state)
+        if value is None: value = estimates[state] = heuristic(state, problem)
+        return value
+
+    def push(state):
+        cost = costs[state]
+        heapq.heappush(frontier, (cost + weight * estimate(state), arrivals[0], state, cost))
+        arrivals[0] += 1
+
+    def openStates():
+        return [state for key, arrival, state, cost in frontier if cost == costs[state] and state not in closed]
+
+    def improvePath():
+        "Expands states until none left can beat the best goal; False if the budget ran out first"
+        expansions = 0
+        while frontier and frontier[0][0] < best[0]:
+            if record: record(len(frontier))
+            if deadline is not None and best[1] is not None and expansions % 64 == 0 and time.perf_counter() > deadline:
+                return False
+            key, arrival, state, cost = heapq.heappop(frontier)
+            if cost != costs[state] or state in closed: continue # superseded entry
+            closed.add(state)
+            if problem.isGoalState(state):
+                goals.add(state)
+                if cost < best[0]: best[:] = [cost, state]
+                continue
+            expansions += 1
+            for next, action, stepCost in problem.getSuccessors(state):
+                nextCost = cost + stepCost
+                if next in costs and costs[next] <= nextCost: continue
+                costs[next] = nextCost
+                parents[next] = (state, action, stepCost)
+                if next in goals and nextCost < best[0]: best[:] = [nextCost, next]
+                if next in closed: inconsistent.add(next) # repaired in the next iteration
+                else: push(next)
+        return True
+
+    push(start)
+    improvePath()
+    if best[1] is None:
+        problem.suboptimalityBound = None
+        print('[ARA*] no plan found')
+        return []
+    # After each finished iteration the best plan costs at most
+    # lowest = min(g + h) over the open and inconsistent states times the
+    # optimal cost, and at most weight times it
+    iterationWeight, lowest = weight, min([costs[s] + estimate(s) for s in openStates()] +
+                                          [costs[s] + estimate(s) for s in inconsistent] + [float('inf')])
+    while weight > 1 and best[0] > lowest:
+        if deadline is not None and time.perf_counter() > deadline: break
+        weight = max(1.0, weight - weightStep)
+        states = set(openStates()) | inconsistent
+        frontier[:] = []
+        closed.clear()
+        inconsistent.clear()
+        for state in states: push(state)
+        if not improvePath(): break
+        iterationWeight, lowest = weight, min([costs[s] + estimate(s) for s in openStates()] +
+                                              [costs[s] + estimate(s) for s in inconsistent] + [float('inf')])
+
+    # Parents may have improved since the goal was reached, so the plan can
+    # cost less than best[0]
+    actions, cost = [], 0
+    state = best[1]
+    while parents[state] is not None:
+        state, action, stepCost = parents[state]
+        actions.append(action)
+        cost += stepCost
+    actions.reverse()
+    bound = max(1.0, min(iterationWeight, cost / lowest if lowest > 0 else iterationWeight))
+    problem.suboptimalityBound = bound
+    print('[ARA*] plan of cost %s within %.3f of optimal (weight %.1f) after %.2f seconds' %
+          (cost, bound, iterationWeight, time.perf_counter() - started))
+    return actions
+
 # Abbreviations
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+bibfs = bidirectionalBreadthFirstSearch
+bidirectional = bidirectionalAStarSearch
+jps = jumpPointSearch
+ida = iterativeDeepeningAStarSearch
+sma = simplifiedMemoryBoundedAStarSearch
+cdfs = compactDepthFirstSearch
+cbfs = compactBreadthFirstSearch
+cucs = compactUniformCostSearch
+castar = compactAStarSearch
+portfolio = portfolioSearch
+hda = hashDistributedAStarSearch
+ara = anytimeRepairingAStarSearch
@@ -38,10 +38,14 @@ from typing import List, Tuple, Any
 from game import Directions
 from game import Agent
 from game import Actions
+from game import FoodMask
 import util
 import time
 import search
 import pacman
+import distanceCalculator
+import searchStats
+from landmarks import landmarkHeuristic # so that SearchAgent finds it by name
 
 class GoWestAgent(Agent):
     "An agent that goes West until it can't."
@@ -70,21 +74,49 @@ class SearchAgent(Agent):
     Options for fn include:
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
-
+      bidirectionalAStarSearch or bidirectional (with an optional heuristic)
+      bidirectionalBreadthFirstSearch or bibfs
+      jumpPointSearch or jps
+      iterativeDeepeningAStarSearch or ida (with an optional heuristic)
+      simplifiedMemoryBoundedAStarSearch or sma (with an optional heuristic)
+      compactDepthFirstSearch, compactBreadthFirstSearch, compactUniformCostSearch
+        and compactAStarSearch, or cdfs, cbfs, cucs and castar (reference
+        versions that keep their nodes in a util.SearchNodeTable)
+      portfolioSearch or portfolio (several searches in parallel processes,
+        see search.PORTFOLIOS)
+      hashDistributedAStarSearch or hda (A* split across one process per CPU,
+        with an optional heuristic)
+      anytimeRepairingAStarSearch or ara (with an optional heuristic)
+
+    ida and sma also take a memory budget in search nodes, e.g.
+    -a fn=sma,prob=FoodSearchProblem,heuristic=foodHeuristic,maxNodes=50000
+
+    ara takes a time budget in seconds, after which it stops improving its
+    plan, e.g. -a fn=ara,heuristic=manhattanHeuristic,budget=2.0
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', maxNodes=None, budget=None):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
         if fn not in dir(search):
             raise AttributeError(fn + ' is not a search function in search.py.')
         func = getattr(search, fn)
+        options = {}
+        if maxNodes is not None:
+            if 'maxNodes' not in func.__code__.co_varnames:
+                raise AttributeError(fn + ' does not take a maxNodes budget.')
+            options['maxNodes'] = int(maxNodes)
+        if budget is not None:
+            if 'budget' not in func.__code__.co_varnames:
+                raise AttributeError(fn + ' does not take a time budget.')
+            options['budget'] = float(budget)
+        self.searchName = fn
         if 'heuristic' not in func.__code__.co_varnames:
             print('[SearchAgent] using function ' + fn)
-            self.searchFunction = func
+            self.searchFunction = lambda x: func(x, **options)
         else:
             if heuristic in globals().keys():
                 heur = globals()[heuristic]
@@ -94,7 +126,8 @@ class SearchAgent(Agent):
                 raise AttributeError(heuristic + ' is not a function in searchAgents.py or search.py.')
             print('[SearchAgent] using function %s and heuristic %s' % (fn, heuristic))
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            self.searchFunction = lambda x, heuristic=heur: func(x, heuristic=heuristic, **options)
+            self.heuristic = heur
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
@@ -114,7 +147,9 @@ class SearchAgent(Agent):
         if self.searchFunction == None: raise Exception("No search function provided for SearchAgent")
         starttime = time.time()
         problem = self.searchType(state) # Makes a new search problem
-        self.actions  = self.searchFunction(problem) # Find a path
+        # Find a path (profiled if searchStats is recording)
+        self.actions = searchStats.runSearch(self.searchFunction, problem, getattr(self, 'heuristic', None),
+                                             getattr(self, 'searchName', type(self).__name__))
         if self.actions == None:
             self.actions = []
         totalCost = problem.getCostOfActions(self.actions)
@@ -157,6 +192,8 @@ class PositionSearchProblem(search.SearchProblem):
         goal: A position in the gameState
         """
         self.walls = gameState.getWalls()
+        self.layout = gameState.data.layout
+        self.compiled = self.layout.getCompiledLayout()
         self.startState = gameState.getPacmanPosition()
         if start != None: self.startState = start
         self.goal = goal
@@ -197,14 +234,9 @@ class PositionSearchProblem(search.SearchProblem):
         """
 
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-                successors.append( ( nextState, action, cost) )
+        for nextState, action in self.compiled.successors[state]:
+            cost = self.costFn(nextState)
+            successors.append( ( nextState, action, cost) )
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -214,6 +246,26 @@ class PositionSearchProblem(search.SearchProblem):
 
         return successors
 
+    def getGoalState(self):
+        return self.goal
+
+    def getPredecessors(self, state):
+        """
+        Returns (predecessor, action, stepCost) triples for the moves that end
+        in state, for bidirectional search; action leads from the predecessor
+        to state and costs costFn(state).
+        """
+        cost = self.costFn(state)
+        predecessors = [(previous, Actions.reverseDirection(action), cost) for previous, action in self.compiled.successors[state]]
+
+        # Bookkeeping for display purposes
+        self._expanded += 1 # DO NOT CHANGE
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return predecessors
+
     def getCostOfActions(self, actions):
         """
         Returns the cost of a particular sequence of actions. If those actions
@@ -277,11 +329,18 @@ class FoodSearchProblem:
 
     A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
       pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-      foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+      foodGrid:       a FoodMask (see game.py) specifying remaining food
+
+    A FoodMask packs the remaining food into the bits of one integer, so it
+    is cheap to copy and hash.  It can be read like a Grid (foodGrid[x][y],
+    foodGrid.count(), foodGrid.asList()), and foodGrid.asGrid() returns a
+    real Grid if you need one.
     """
     def __init__(self, startingGameState: pacman.GameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
         self.walls = startingGameState.getWalls()
+        self.compiled = startingGameState.data.layout.getCompiledLayout()
+        self.cells = self.compiled.cells
+        self.start = (startingGameState.getPacmanPosition(), FoodMask.fromGrid(startingGameState.getFood(), self.cells))
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
         self.heuristicInfo = {} # A dictionary for the heuristic to store information
@@ -290,20 +349,15 @@ class FoodSearchProblem:
         return self.start
 
     def isGoalState(self, state):
-        return state[1].count() == 0
+        return state[1].mask == 0
 
     def getSuccessors(self, state):
         "Returns successor states, the actions they require, and a cost of 1."
         successors = []
         self._expanded += 1 # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
+        food = state[1]
+        for nextPosition, direction in self.compiled.successors[state[0]]:
+            successors.append( ( (nextPosition, food.eat(nextPosition)), direction, 1) )
         return successors
 
     def getCostOfActions(self, actions):
@@ -328,7 +382,7 @@ class AStarFoodSearchAgent(SearchAgent):
         self.searchType = FoodSearchProblem
 
 
-def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
+def foodHeuristic(state: Tuple[Tuple, FoodMask], problem: FoodSearchProblem):
     """
     Your heuristic for the FoodSearchProblem goes here.
 
@@ -336,9 +390,10 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     your search may have a but our your heuristic is not admissible!  On the
     other hand, inadmissible heuristics may find optimal solutions, so be careful.
 
-    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
-    (see game.py) of either True or False. You can call foodGrid.asList() to get
-    a list of food coordinates instead.
+    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a
+    FoodMask (see game.py) that reads like a Grid of True or False. You can
+    call foodGrid.asList() to get a list of food coordinates instead, or
+    foodGrid.asGrid() to get a Grid.
 
     If you want access to info like walls, capsules, etc., you can query the
     problem.  For example, problem.walls gives you a Grid of where the walls
@@ -350,6 +405,10 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     value, try: problem.heuristicInfo['wallCount'] = problem.walls.count()
     Subsequent calls to this heuristic can access
     problem.heuristicInfo['wallCount']
+
+    Exact maze distances between any two cells are available from
+    distanceCalculator.getOracle(problem.startingGameState.data.layout), in
+    O(1) on boards of up to distanceCalculator.MAX_ORACLE_CELLS open cells.
     """
     position, foodGrid = state
     "*** YOUR CODE HERE ***"
@@ -358,9 +417,14 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
 
 def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int], gameState: pacman.GameState) -> int:
     """
-    Returns the maze distance between any two points, using the search functions
-    you have already built. The gameState can be any game state -- Pacman's
-    position in that state is ignored.
+    Returns the maze distance between any two points. The gameState can be any
+    game state -- Pacman's position in that state is ignored.
+
+    Distances come from the layout's MazeDistanceOracle (see
+    distanceCalculator.py), which is built on the first call and shared by
+    every later call on the same layout, so each lookup is O(1).  Boards
+    with more than MAX_ORACLE_CELLS open cells run a breadth-first search
+    per new source cell instead.
 
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
@@ -371,5 +435,4 @@ def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int], gameState: pa
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    return distanceCalculator.getOracle(gameState.data.layout).distance(point1, point2)
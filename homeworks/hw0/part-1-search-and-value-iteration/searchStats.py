@@ -0,0 +1,299 @@
+# searchStats.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Instrumentation for search algorithms.  profileSearch runs any search
+function on an InstrumentedProblem wrapped around a search.SearchProblem and
+returns a SearchStats: nodes expanded and generated, duplicate states, where
+the time went (successors, heuristic) and peak memory from tracemalloc, plus
+the largest frontier and the time spent on it for searches that report
+their frontier.
+
+> actions, stats = searchStats.profileSearch(search.ucs, problem)
+> print(stats)
+
+Search agents record a SearchStats for every search while a recorder is
+active, which is how pacman.py --searchStats works:
+
+> with searchStats.record() as recorder:
+>     pacman.runGames(**args)
+> searchStats.dump(recorder.stats, 'stats.json')
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+
+class SearchStats:
+    """
+    What one search did.  Times are in seconds and peakMemory in bytes above
+    what was allocated when the search started (None if memory was not
+    tracked).  expanded follows problem._expanded when the problem keeps
+    it.  maxFrontier, queueOperations and queueSeconds are only measured for
+    searches that report their frontier (see InstrumentedProblem) and are
+    None otherwise; searches with their own heap or stack report its size
+    but not its timing.
+    """
+    def __init__(self, search='', problem='', heuristic=None):
+        self.search = search
+        self.problem = problem
+        self.heuristic = heuristic
+        self.pathLength = None
+        self.pathCost = None
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.goalTests = 0
+        self.maxFrontier = None
+        self.queueOperations = None
+        self.heuristicCalls = 0
+        self.totalSeconds = 0.0
+        self.successorSeconds = 0.0
+        self.heuristicSeconds = 0.0
+        self.queueSeconds = None
+        self.peakMemory = None
+        self.suboptimalityBound = None
+
+    def asDict(self):
+        return dict(self.__dict__)
+
+    def __str__(self):
+        heuristic = ' with %s' % self.heuristic if self.heuristic else ''
+        frontier = 'not measured' if self.maxFrontier is None else '%d' % self.maxFrontier
+        queues = 'not measured' if self.queueSeconds is None else '%.4fs (%d operations)' % (self.queueSeconds, self.queueOperations)
+        lines = ['Search %s%s on %s: path length %s, cost %s' % (self.search, heuristic, self.problem, self.pathLength, self.pathCost),
+                 'Expanded %d, generated %d (%d duplicates), goal tests %d, largest frontier %s' %
+                 (self.expanded, self.generated, self.duplicates, self.goalTests, frontier),
+                 'Time %.4fs: successors %.4fs, heuristic %.4fs (%d calls), queues %s' %
+                 (self.totalSeconds, self.successorSeconds, self.heuristicSeconds, self.heuristicCalls, queues)]
+        if self.suboptimalityBound is not None:
+            lines.append('Cost within %.3f of optimal' % self.suboptimalityBound)
+        if self.peakMemory is not None:
+            lines.append('Peak memory %.2f MB' % (self.peakMemory / 2.0 ** 20))
+        return '\n'.join(lines)
+
+class InstrumentedProblem:
+    """
+    A search problem that counts and times the calls a search makes to the
+    problem it wraps.  Every other attribute is read from and written to the
+    wrapped problem, so bookkeeping such as problem._expanded still lands
+    there.  Duplicates are generated states that were generated before,
+    which needs a set of every state seen.
+
+    Searches report their frontier through two hooks: watchFrontier for a
+    util queue, whose operations are then timed, and recordFrontier for the
+    size of a frontier they keep themselves.
+    """
+    _OWN = ('problem', 'stats', 'seen', 'frontiers')
+
+    def __init__(self, problem, stats):
+        object.__setattr__(self, 'problem', problem)
+        object.__setattr__(self, 'stats', stats)
+        object.__setattr__(self, 'seen', set([problem.getStartState()]))
+        object.__setattr__(self, 'frontiers', [])
+
+    def watchFrontier(self, queue):
+        """
+        Returns a util queue that the search uses as its frontier (or one of
+        its frontiers) wrapped to time its operations; the frontier size is
+        the total over every watched queue.
+        """
+        self.frontiers.append(queue)
+        if self.stats.queueSeconds is None:
+            self.stats.queueSeconds, self.stats.queueOperations = 0.0, 0
+        self.recordFrontier(self.frontierSize())
+        return _TimedFrontier(queue, self)
+
+    def frontierSize(self):
+        return sum(_queueSize(queue) for queue in self.frontiers)
+
+    def recordFrontier(self, size):
+        "Reports the current size of the frontier"
+        if self.stats.maxFrontier is None or size > self.stats.maxFrontier: self.stats.maxFrontier = size
+
+    def getStartState(self):
+        return self.problem.getStartState()
+
+    def isGoalState(self, state):
+        self.stats.goalTests += 1
+        return self.problem.isGoalState(state)
+
+    def getSuccessors(self, state):
+        return self._record(self.problem.getSuccessors, state)
+
+    def _record(self, method, state):
+        stats, seen = self.stats, self.seen
+        start = time.perf_counter()
+        moves = method(state)
+        stats.successorSeconds += time.perf_counter() - start
+        stats.expanded += 1
+        stats.generated += len(moves)
+        for move in moves:
+            if move[0] in seen: stats.duplicates += 1
+            else: seen.add(move[0])
+        return moves
+
+    def getCostOfActions(self, actions):
+        return self.problem.getCostOfActions(actions)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.problem, name)
+        if name == 'getPredecessors': # bidirectional searches expand with it
+            return lambda state: self._record(attribute, state)
+        return attribute
+
+    def __setattr__(self, name, value):
+        if name in self._OWN: object.__setattr__(self, name, value)
+        else: setattr(self.problem, name, value)
+
+def timedHeuristic(heuristic, stats):
+    "Returns heuristic wrapped to count its calls and time into stats"
+    def timed(state, problem=None):
+        start = time.perf_counter()
+        value = heuristic(state, problem)
+        stats.heuristicSeconds += time.perf_counter() - start
+        stats.heuristicCalls += 1
+        return value
+    return timed
+
+def _queueSize(queue):
+    "util.Stack and util.Queue keep their items in queue.list"
+    return len(queue.list) if hasattr(queue, 'list') else len(queue)
+
+class _TimedFrontier:
+    """
+    A util queue returned by InstrumentedProblem.watchFrontier: push, pop,
+    update and remove are timed into the stats of the problem, which then
+    records the frontier size.  Everything else is read from the queue.
+    """
+    def __init__(self, queue, problem):
+        self.queue = queue
+        self.problem = problem
+
+    def push(self, *args):
+        return self._timed(self.queue.push, args)
+
+    def pop(self):
+        return self._timed(self.queue.pop, ())
+
+    def update(self, *args):
+        return self._timed(self.queue.update, args)
+
+    def remove(self, *args):
+        return self._timed(self.queue.remove, args)
+
+    def _timed(self, method, args):
+        problem = self.problem
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            problem.stats.queueSeconds += time.perf_counter() - start
+            problem.stats.queueOperations += 1
+            problem.recordFrontier(problem.frontierSize())
+
+    def __len__(self):
+        return _queueSize(self.queue)
+
+    def __contains__(self, item):
+        return item in self.queue
+
+    def __getattr__(self, name):
+        return getattr(self.queue, name)
+
+def profileSearch(searchFunction, problem, heuristic=None, name=None, trackMemory=True):
+    """
+    Runs searchFunction(problem), or searchFunction(problem, heuristic=...)
+    if a heuristic is given, with the problem wrapped in an
+    InstrumentedProblem.  Returns the actions it found and a SearchStats.
+    """
+    stats = SearchStats(name or getattr(searchFunction, '__name__', str(searchFunction)), type(problem).__name__,
+                        getattr(heuristic, '__name__', None))
+    wrapped = InstrumentedProblem(problem, stats)
+    expandedBefore = getattr(problem, '_expanded', None)
+    started = False
+    if trackMemory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started = True
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    try:
+        start = time.perf_counter()
+        if heuristic is None: actions = searchFunction(wrapped)
+        else: actions = searchFunction(wrapped, heuristic=timedHeuristic(heuristic, stats))
+        stats.totalSeconds = time.perf_counter() - start
+        if trackMemory:
+            stats.peakMemory = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        if started: tracemalloc.stop()
+    if expandedBefore is not None:
+        # Searches such as jumpPointSearch count expansions without getSuccessors
+        stats.expanded = problem._expanded - expandedBefore
+    # Anytime searches such as anytimeRepairingAStarSearch leave a bound
+    stats.suboptimalityBound = getattr(problem, 'suboptimalityBound', None)
+    if actions is not None:
+        stats.pathLength = len(actions)
+        stats.pathCost = problem.getCostOfActions(actions)
+    return actions, stats
+
+_RECORDERS = [] # active recorders, innermost last
+
+class record:
+    """
+    Context manager under which search agents profile their searches and
+    add the SearchStats to the recorder's stats list.
+    """
+    def __init__(self, trackMemory=True):
+        self.stats = []
+        self.trackMemory = trackMemory
+
+    def __enter__(self):
+        _RECORDERS.append(self)
+        return self
+
+    def __exit__(self, *excInfo):
+        _RECORDERS.remove(self)
+        return False
+
+def isRecording():
+    return len(_RECORDERS) > 0
+
+def report(stats):
+    "Adds SearchStats gathered elsewhere (e.g. in a worker process) to the active recorder"
+    if _RECORDERS: _RECORDERS[-1].stats.extend(stats)
+
+def runSearch(searchFunction, problem, heuristic=None, name=None):
+    """
+    Runs a search the way search agents do: profiled and recorded if a
+    recorder is active, otherwise directly.
+    """
+    if not _RECORDERS:
+        if heuristic is None: return searchFunction(problem)
+        return searchFunction(problem, heuristic=heuristic)
+    actions, stats = profileSearch(searchFunction, problem, heuristic, name, _RECORDERS[-1].trackMemory)
+    report([stats])
+    return actions
+
+def dump(stats, path):
+    "Writes a list of SearchStats as JSON to path, or to standard output if path is '-'"
+    records = [s.asDict() for s in stats]
+    if path == '-':
+        json.dump(records, sys.stdout, indent=2)
+        print()
+        return
+    f = open(path, 'w')
+    try: json.dump(records, f, indent=2)
+    finally: f.close()
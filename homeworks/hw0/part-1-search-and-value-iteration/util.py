@@ -29,6 +29,8 @@
 import sys
 import inspect
 import heapq, random
+from collections import deque
+from array import array
 
 
 class FixedRandom:
@@ -150,60 +152,377 @@ class Stack:
 class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
     def __init__(self):
-        self.list = []
+        self.list = deque()
 
     def push(self,item):
         "Enqueue the 'item' into the queue"
-        self.list.insert(0,item)
+        self.list.append(item)
 
     def pop(self):
         """
           Dequeue the earliest enqueued item still in the queue. This
           operation removes the item from the queue.
         """
-        return self.list.pop()
+        return self.list.popleft()
 
     def isEmpty(self):
         "Returns true if the queue is empty"
         return len(self.list) == 0
 
+_REMOVED = object() # Placeholder for heap entries that have been lazily deleted
+
 class PriorityQueue:
     """
       Implements a priority queue data structure. Each inserted item
       has a priority associated with it and the client is usually interested
       in quick retrieval of the lowest-priority item in the queue. This
       data structure allows O(1) access to the lowest-priority item.
+
+      push and pop are plain heap operations.  The first call to update,
+      remove or a membership test indexes the queued items (item -> a small
+      heap of its entries); from then on membership tests are O(1) and
+      update/remove are O(log n): the stale entry is marked as removed in
+      place and skipped when it reaches the top of the heap.  Unhashable
+      items (e.g. tuples holding a list of actions) are not indexed; update
+      falls back to a linear scan for them.
     """
     def  __init__(self):
         self.heap = []
         self.count = 0
+        self.entryFinder = None # item -> heap of its entries [priority, count, item], once indexed
+        self.liveCounts = None  # item -> number of live entries (push allows duplicates)
+        self.size = 0           # live entries, once indexed
+        self.removed = 0
 
     def push(self, item, priority):
-        entry = (priority, self.count, item)
-        heapq.heappush(self.heap, entry)
-        self.count += 1
+        if self.entryFinder is None:
+            heapq.heappush(self.heap, (priority, self.count, item))
+            self.count += 1
+        else:
+            self._pushIndexed(item, priority)
 
     def pop(self):
-        (_, _, item) = heapq.heappop(self.heap)
-        return item
+        if self.entryFinder is None:
+            return heapq.heappop(self.heap)[2]
+        return self._popIndexed()
 
     def isEmpty(self):
-        return len(self.heap) == 0
+        if self.entryFinder is None:
+            return len(self.heap) == 0
+        return self.size == 0
+
+    def peekPriority(self):
+        "Returns the lowest priority in the queue without popping its item"
+        if self.entryFinder is None:
+            return self._peekEntry()[0]
+        while True:
+            entry = self._peekEntry()
+            if entry[2] is not _REMOVED:
+                return entry[0]
+            self._popEntry()
+            self.removed -= 1
+
+    def __len__(self):
+        if self.entryFinder is None:
+            return len(self.heap)
+        return self.size
+
+    def __contains__(self, item):
+        self._index()
+        try:
+            return item in self.liveCounts
+        except TypeError:
+            return self._scan(item) is not None
 
     def update(self, item, priority):
-        # If item already in priority queue with higher priority, update its priority and rebuild the heap.
+        # If item already in priority queue with higher priority, update its priority.
         # If item already in priority queue with equal or lower priority, do nothing.
         # If item not in priority queue, do the same thing as self.push.
-        for index, (p, c, i) in enumerate(self.heap):
-            if i == item:
-                if p <= priority:
-                    break
-                del self.heap[index]
-                self.heap.append((priority, c, item))
-                heapq.heapify(self.heap)
+        self._index()
+        try:
+            entry = self._best(item)
+        except TypeError:
+            entry = self._scan(item)
+        if entry is not None:
+            if entry[0] <= priority:
+                return
+            self._invalidate(entry)
+        self._pushIndexed(item, priority)
+
+    def remove(self, item):
+        """
+          Lazily deletes the best entry for 'item' from the queue.  Raises
+          KeyError if the item is not in the queue.
+        """
+        self._index()
+        try:
+            entry = self._best(item)
+        except TypeError:
+            entry = self._scan(item)
+        if entry is None:
+            raise KeyError(item)
+        self._invalidate(entry)
+
+    def _index(self):
+        "Switches to indexed entries on the first update, remove or membership test"
+        if self.entryFinder is not None: return
+        self._convertEntries(list)
+        self.entryFinder, self.liveCounts = {}, {}
+        self.size = 0
+        for entry in self._entries():
+            self.size += 1
+            self._indexEntry(entry)
+
+    def _indexEntry(self, entry):
+        item = entry[2]
+        try:
+            entries = self.entryFinder.get(item)
+        except TypeError:
+            return
+        if entries is None:
+            self.entryFinder[item] = [entry]
+        else:
+            heapq.heappush(entries, entry)
+        self.liveCounts[item] = self.liveCounts.get(item, 0) + 1
+
+    def _pushIndexed(self, item, priority):
+        entry = [priority, self.count, item]
+        self._pushEntry(entry)
+        self.count += 1
+        self.size += 1
+        self._indexEntry(entry)
+
+    def _popIndexed(self):
+        while True:
+            entry = self._popEntry()
+            item = entry[2]
+            if item is not _REMOVED:
                 break
+            self.removed -= 1
+        entry[2] = _REMOVED # dead in the item's own heap too
+        self.size -= 1
+        self._forget(item)
+        return item
+
+    def _best(self, item):
+        "Returns the live entry of a hashable item with the lowest priority, or None"
+        entries = self.entryFinder.get(item)
+        if entries is None:
+            return None
+        while entries[0][2] is _REMOVED:
+            heapq.heappop(entries)
+        return entries[0]
+
+    def _scan(self, item):
+        best = None
+        for entry in self._entries():
+            if entry[2] is not _REMOVED and entry[2] == item and (best is None or entry < best):
+                best = entry
+        return best
+
+    def _invalidate(self, entry):
+        item = entry[2]
+        entry[2] = _REMOVED
+        self.size -= 1
+        self.removed += 1
+        self._forget(item)
+        # Compact once stale entries dominate, so the heap stays O(live items)
+        if self.removed > 64 and self.removed > self.size:
+            self._compact()
+            self.removed = 0
+
+    def _forget(self, item):
+        "Counts one entry of item as gone; its dead entry leaves the item's heap lazily"
+        try:
+            live = self.liveCounts.get(item)
+        except TypeError:
+            return
+        if live == 1:
+            del self.liveCounts[item]
+            del self.entryFinder[item]
+        else:
+            self.liveCounts[item] = live - 1
+
+    # Storage of the entries, which BucketQueue replaces
+
+    def _pushEntry(self, entry):
+        heapq.heappush(self.heap, entry)
+
+    def _popEntry(self):
+        return heapq.heappop(self.heap)
+
+    def _peekEntry(self):
+        return self.heap[0]
+
+    def _entries(self):
+        return self.heap
+
+    def _convertEntries(self, convert):
+        self.heap = [convert(e) for e in self.heap] # entries compare the same, so it stays a heap
+
+    def _compact(self):
+        self.heap = [e for e in self.heap if e[2] is not _REMOVED]
+        heapq.heapify(self.heap)
+
+class BucketQueue(PriorityQueue):
+    """
+      A Dial-style bucket queue with the same interface as PriorityQueue,
+      for searches whose priorities are small non-negative integers (unit
+      step costs, integer heuristics).  Items live in one FIFO bucket per
+      priority and pop scans forward from the smallest non-empty bucket, so
+      push and pop are O(1) amortized instead of O(log n).  Ties pop in
+      insertion order, as in PriorityQueue.  Until the first update, remove
+      or membership test indexes the queue, buckets hold bare items.
+
+      The queue detects when its costs do not fit: the first priority that is
+      not a non-negative integer, or that would spread the priorities in the
+      queue over more than MAX_SPAN, moves every entry into the binary heap
+      and the queue behaves exactly like a PriorityQueue from then on.
+    """
+    MAX_SPAN = 1 << 16
+
+    def  __init__(self):
+        PriorityQueue.__init__(self)
+        self.buckets = {} # priority -> deque of items (of entries once indexed)
+        self.cursor = 0   # no bucket below the cursor holds an entry
+        self.top = 0      # no bucket above the top holds an entry
+        self.bucketed = 0
+
+    def usingBuckets(self):
+        "Returns true until the queue has fallen back to a binary heap"
+        return self.buckets is not None
+
+    def push(self, item, priority):
+        if self.entryFinder is not None or self.buckets is None:
+            return PriorityQueue.push(self, item, priority)
+        bucket = self.buckets.get(priority)
+        if bucket is None:
+            if not self._fits(priority):
+                self._fallBack()
+                return PriorityQueue.push(self, item, priority)
+            bucket = self.buckets[priority] = deque()
+        bucket.append(item)
+        self.bucketed += 1
+
+    def pop(self):
+        if self.entryFinder is not None or self.buckets is None:
+            return PriorityQueue.pop(self)
+        bucket = self._firstBucket()
+        item = bucket.popleft()
+        if not bucket:
+            del self.buckets[self.cursor]
+        self.bucketed -= 1
+        return item
+
+    def isEmpty(self):
+        if self.buckets is None or self.entryFinder is not None:
+            return PriorityQueue.isEmpty(self)
+        return self.bucketed == 0
+
+    def peekPriority(self):
+        if self.entryFinder is not None or self.buckets is None:
+            return PriorityQueue.peekPriority(self)
+        self._firstBucket()
+        return self.cursor
+
+    def __len__(self):
+        if self.buckets is None or self.entryFinder is not None:
+            return PriorityQueue.__len__(self)
+        return self.bucketed
+
+    def _fits(self, priority):
+        "Makes room for a new bucket for priority, or returns False if it does not fit"
+        try:
+            key = int(priority)
+        except (TypeError, ValueError, OverflowError):
+            return False
+        if key != priority or key < 0:
+            return False
+        if self.bucketed == 0:
+            self.cursor = self.top = key
+            return True
+        low, high = min(self.cursor, key), max(self.top, key)
+        if high - low > self.MAX_SPAN:
+            return False
+        self.cursor, self.top = low, high
+        return True
+
+    def _firstBucket(self):
+        "Moves the cursor to the smallest non-empty bucket and returns it"
+        if self.bucketed == 0:
+            raise IndexError('pop from an empty priority queue')
+        buckets, cursor = self.buckets, self.cursor
+        bucket = buckets.get(cursor)
+        while bucket is None: # at most MAX_SPAN steps
+            cursor += 1
+            bucket = buckets.get(cursor)
+        self.cursor = cursor
+        return bucket
+
+    def _pushEntry(self, entry):
+        if self.buckets is None:
+            return heapq.heappush(self.heap, entry)
+        bucket = self.buckets.get(entry[0])
+        if bucket is None:
+            if not self._fits(entry[0]):
+                self._fallBack()
+                return heapq.heappush(self.heap, entry)
+            bucket = self.buckets[entry[0]] = deque()
+        bucket.append(entry)
+        self.bucketed += 1
+
+    def _popEntry(self):
+        if self.buckets is None:
+            return heapq.heappop(self.heap)
+        bucket = self._firstBucket()
+        entry = bucket.popleft()
+        if not bucket:
+            del self.buckets[self.cursor]
+        self.bucketed -= 1
+        return entry
+
+    def _peekEntry(self):
+        if self.buckets is None:
+            return self.heap[0]
+        return self._firstBucket()[0]
+
+    def _entries(self):
+        if self.buckets is None:
+            return self.heap
+        return [entry for bucket in self.buckets.values() for entry in bucket]
+
+    def _convertEntries(self, convert):
+        if self.buckets is None:
+            return PriorityQueue._convertEntries(self, convert)
+        # Bare items become entries; counts keep each bucket in FIFO order
+        for priority in sorted(self.buckets):
+            entries = deque()
+            for item in self.buckets[priority]:
+                entries.append(convert((priority, self.count, item)))
+                self.count += 1
+            self.buckets[priority] = entries
+
+    def _compact(self):
+        if self.buckets is None:
+            return PriorityQueue._compact(self)
+        for priority in list(self.buckets):
+            live = deque(e for e in self.buckets[priority] if e[2] is not _REMOVED)
+            if live:
+                self.buckets[priority] = live
+            else:
+                del self.buckets[priority]
+        self.bucketed = sum(len(b) for b in self.buckets.values())
+
+    def _fallBack(self):
+        if self.entryFinder is None:
+            self._convertEntries(tuple)
+            self.heap = self._entries()
         else:
-            self.push(item, priority)
+            self.heap = [e for e in self._entries() if e[2] is not _REMOVED]
+            self.removed = 0
+        heapq.heapify(self.heap)
+        self.buckets = None
+        self.bucketed = 0
 
 class PriorityQueueWithFunction(PriorityQueue):
     """
@@ -221,6 +540,114 @@ class PriorityQueueWithFunction(PriorityQueue):
         "Adds an item to the queue with priority from the priority function"
         PriorityQueue.push(self, item, self.priorityFunction(item))
 
+class BucketQueueWithFunction(BucketQueue):
+    """
+    A BucketQueue with the push signature of PriorityQueueWithFunction, for
+    frontiers whose priority function gives small non-negative integers.
+    """
+    def  __init__(self, priorityFunction):
+        "priorityFunction (item) -> priority"
+        self.priorityFunction = priorityFunction
+        BucketQueue.__init__(self)
+
+    def push(self, item):
+        "Adds an item to the queue with priority from the priority function"
+        BucketQueue.push(self, item, self.priorityFunction(item))
+
+class SearchNodeTable:
+    """
+      Search nodes stored column by column in typed arrays, so that a
+      frontier only holds node indices instead of a state and a list of
+      actions per entry.
+
+      Node i holds the state with id stateIds[i], was reached from node
+      parents[i] (ROOT for the start) by the action with code actions[i], and
+      costs[i] is its path cost.  States and actions are interned: each
+      distinct state is stored once however many nodes reach it, along with
+      its cheapest node and the path cost it was expanded at, for graph
+      search.  getPath rebuilds the actions to a node by following its
+      parents.
+    """
+    ROOT = -1
+    OPEN = float('inf') # the closed cost of a state that was never expanded
+
+    def __init__(self):
+        self.states = []       # state id -> state
+        self.stateIndex = {}   # state -> state id
+        self.bestNodes = array('i')   # state id -> node with the lowest path cost
+        self.closedCosts = array('d') # state id -> path cost it was expanded at
+        self.actionList = []   # action code -> action
+        self.actionIndex = {}  # action -> action code
+        self.stateIds = array('i')
+        self.parents = array('i')
+        self.actions = array('h')
+        self.costs = array('d')
+
+    def addNode(self, state, parent=ROOT, action=None, cost=0):
+        "Stores a node and returns its index"
+        stateId = self.stateIndex.get(state)
+        if stateId is None:
+            stateId = self.stateIndex[state] = len(self.states)
+            self.states.append(state)
+            self.bestNodes.append(len(self.parents))
+            self.closedCosts.append(self.OPEN)
+        elif cost < self.costs[self.bestNodes[stateId]]:
+            self.bestNodes[stateId] = len(self.parents)
+        code = self.actionIndex.get(action)
+        if code is None:
+            code = self.actionIndex[action] = len(self.actionList)
+            self.actionList.append(action)
+        self.stateIds.append(stateId)
+        self.parents.append(parent)
+        self.actions.append(code)
+        self.costs.append(cost)
+        return len(self.parents) - 1
+
+    def __len__(self):
+        return len(self.parents)
+
+    def getState(self, node):
+        return self.states[self.stateIds[node]]
+
+    def getStateId(self, state):
+        "Returns the id of a state, or None if no node holds it"
+        return self.stateIndex.get(state)
+
+    def getCost(self, node):
+        return self.costs[node]
+
+    def getBestCost(self, state):
+        "Returns the lowest path cost of a node holding state (OPEN if there is none)"
+        stateId = self.stateIndex.get(state)
+        if stateId is None: return self.OPEN
+        return self.costs[self.bestNodes[stateId]]
+
+    def getParent(self, node):
+        return self.parents[node]
+
+    def close(self, node):
+        "Marks the state of a node as expanded at the node's path cost"
+        self.closedCosts[self.stateIds[node]] = self.costs[node]
+
+    def isClosed(self, state, cost=None):
+        """
+          True if the state was expanded, or if cost is given, expanded at a
+          path cost no higher than cost.
+        """
+        stateId = self.stateIndex.get(state)
+        if stateId is None: return False
+        closedCost = self.closedCosts[stateId]
+        if cost is None: return closedCost != self.OPEN
+        return closedCost <= cost
+
+    def getPath(self, node):
+        "Returns the list of actions from the root to a node"
+        path = []
+        while self.parents[node] != self.ROOT:
+            path.append(self.actionList[self.actions[node]])
+            node = self.parents[node]
+        path.reverse()
+        return path
 
 def manhattanDistance( xy1, xy2 ):
     "Returns the Manhattan distance between points xy1 and xy2"
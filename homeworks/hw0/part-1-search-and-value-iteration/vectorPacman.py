@@ -0,0 +1,302 @@
+# vectorPacman.py
+# ---------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+A lockstep simulator that plays many games of the same layout at once.
+
+GameState.generateSuccessor allocates a new GameState, GameStateData,
+AgentStates and Configurations for every ply, which dominates the cost of
+long rollouts.  A LockstepSimulator instead keeps the state of K games in
+flat columns, one per state variable (agent positions, directions, scared
+timers, food and capsule bitmasks, scores and outcomes), and applies one
+agent's move to every game in a single call, following the rules of
+PacmanRules and GhostRules in pacman.py.
+
+> sim = LockstepSimulator(layout.getLayout('smallClassic'), 100)
+> while sim.numActive() > 0:
+>     for agentIndex in range(sim.numAgents):
+>         sim.step(agentIndex, [random.choice(l) if l else None for l in sim.getLegalActions(agentIndex)])
+
+Positions are stored doubled, as integers, so that scared ghosts, which move
+half a cell per turn, never need floating point arithmetic.  Run this file
+to check the simulator against the scalar rules:
+
+> python vectorPacman.py
+"""
+
+from array import array
+from game import Directions, Actions, CellIndex
+from pacman import SCARED_TIME, COLLISION_TOLERANCE, TIME_PENALTY
+import random
+
+# Directions are stored as indices into DIRECTIONS, in the order in which
+# Actions.getPossibleActions lists them
+DIRECTIONS = [direction for direction, vector in Actions._directionsAsList]
+DIRECTION_IDS = dict((direction, i) for i, direction in enumerate(DIRECTIONS))
+STOP = DIRECTION_IDS[Directions.STOP]
+REVERSE = [DIRECTION_IDS[Actions.reverseDirection(direction)] for direction in DIRECTIONS]
+VECTORS = [Actions._directions[direction] for direction in DIRECTIONS]
+
+RUNNING, WON, LOST = 0, 1, 2
+
+class LockstepSimulator:
+    """
+    Plays numGames games of one layout in lockstep.
+
+    Agents move in turn as in Game.run: every call to step moves one agent in
+    every game that is still running.  Finished games are left untouched, so
+    the columns always hold each game's final state.
+    """
+
+    def __init__(self, layout, numGames, numGhostAgents=1000):
+        self.layout = layout
+        self.numGames = numGames
+        walls = layout.walls
+        self.cells = CellIndex(walls)
+
+        # Same agents as GameStateData.initialize
+        self.starts = []
+        numGhosts = 0
+        for isPacman, pos in layout.agentPositions:
+            if not isPacman:
+                if numGhosts == numGhostAgents: continue
+                numGhosts += 1
+            self.starts.append((2 * pos[0], 2 * pos[1]))
+        self.numAgents = len(self.starts)
+
+        # Legal moves of pacman, and of a ghost for each direction it may be facing, per open cell
+        self.pacmanLegal = {}
+        self.ghostLegal = {}
+        for x, y in self.cells.positions:
+            possible = tuple(i for i, (dx, dy) in enumerate(VECTORS) if not walls[x + dx][y + dy])
+            self.pacmanLegal[(x, y)] = possible
+            noStop = tuple(i for i in possible if i != STOP)
+            for facing in range(len(DIRECTIONS)):
+                legal = noStop
+                if REVERSE[facing] in legal and len(legal) > 1:
+                    legal = tuple(i for i in legal if i != REVERSE[facing])
+                self.ghostLegal[(x, y, facing)] = legal
+
+        self.initialFood = self.cells.packGrid(layout.food)
+        self.initialCapsules = 0
+        for pos in layout.capsules:
+            self.initialCapsules |= 1 << self.cells.index[pos]
+        self.reset()
+
+    def reset(self):
+        "Puts every game back in its initial state."
+        K = self.numGames
+        self.posX = [array('i', [x]) * K for x, y in self.starts]
+        self.posY = [array('i', [y]) * K for x, y in self.starts]
+        self.direction = [array('b', [STOP]) * K for a in self.starts]
+        self.scaredTimer = [array('i', [0]) * K for a in self.starts]
+        self.food = [self.initialFood] * K
+        self.capsules = [self.initialCapsules] * K
+        self.score = array('l', [0]) * K
+        self.status = array('b', [RUNNING]) * K
+        self.moves = 0
+
+    def resetGame(self, game):
+        "Puts one game back in its initial state, leaving the others alone."
+        for index, (x, y) in enumerate(self.starts):
+            self.posX[index][game], self.posY[index][game] = x, y
+            self.direction[index][game] = STOP
+            self.scaredTimer[index][game] = 0
+        self.food[game] = self.initialFood
+        self.capsules[game] = self.initialCapsules
+        self.score[game] = 0
+        self.status[game] = RUNNING
+
+    def numActive(self):
+        return self.status.count(RUNNING)
+
+    def isWin(self, game):
+        return self.status[game] == WON
+
+    def isLose(self, game):
+        return self.status[game] == LOST
+
+    def getScore(self, game):
+        return self.score[game]
+
+    def getNumFood(self, game):
+        return self.food[game].bit_count()
+
+    def getPosition(self, agentIndex, game):
+        return (self.posX[agentIndex][game] / 2.0, self.posY[agentIndex][game] / 2.0)
+
+    def getDirection(self, agentIndex, game):
+        return DIRECTIONS[self.direction[agentIndex][game]]
+
+    def getCapsules(self, game):
+        mask = self.capsules[game]
+        return [pos for i, pos in enumerate(self.cells.positions) if mask >> i & 1]
+
+    def _legalIds(self, agentIndex, game):
+        x2, y2 = self.posX[agentIndex][game], self.posY[agentIndex][game]
+        facing = self.direction[agentIndex][game]
+        # In between grid points, agents must continue straight
+        if x2 & 1 or y2 & 1: return (facing,)
+        if agentIndex == 0: return self.pacmanLegal[(x2 >> 1, y2 >> 1)]
+        return self.ghostLegal[(x2 >> 1, y2 >> 1, facing)]
+
+    def getLegalActions(self, agentIndex):
+        """
+        Returns, for every game, the list of legal actions of the agent; the
+        list is empty for finished games, as in GameState.getLegalActions.
+        """
+        status = self.status
+        return [[DIRECTIONS[i] for i in self._legalIds(agentIndex, k)] if status[k] == RUNNING else []
+                for k in range(self.numGames)]
+
+    def step(self, agentIndex, actions):
+        """
+        Moves the agent in every running game; actions[k] is its action in
+        game k and is ignored for finished games.  Returns the score changes.
+        """
+        if agentIndex == 0:
+            return self._stepPacman(actions)
+        return self._stepGhost(agentIndex, actions)
+
+    def _stepPacman(self, actions):
+        numAgents = self.numAgents
+        posX, posY, direction, scaredTimer = self.posX, self.posY, self.direction, self.scaredTimer
+        pacX, pacY, pacDir = posX[0], posY[0], direction[0]
+        food, capsules, score, status = self.food, self.capsules, self.score, self.status
+        cellIndex = self.cells.index
+        changes = array('l', [0]) * self.numGames
+        for k in range(self.numGames):
+            if status[k] != RUNNING: continue
+            move = DIRECTION_IDS[actions[k]]
+            if move not in self._legalIds(0, k):
+                raise Exception("Illegal action " + str(actions[k]))
+            dx, dy = VECTORS[move]
+            x2, y2 = pacX[k] + 2 * dx, pacY[k] + 2 * dy
+            pacX[k], pacY[k] = x2, y2
+            if move != STOP: pacDir[k] = move
+
+            # Eat
+            change = 0
+            bit = 1 << cellIndex[(x2 >> 1, y2 >> 1)]
+            if food[k] & bit:
+                change += 10
+                food[k] ^= bit
+                if not food[k]:
+                    change += 500
+                    status[k] = WON
+            if capsules[k] & bit:
+                capsules[k] ^= bit
+                for index in range(1, numAgents):
+                    scaredTimer[index][k] = SCARED_TIME
+            change -= TIME_PENALTY
+
+            # Anyone can kill pacman
+            for index in range(1, numAgents):
+                change += self._collide(index, k, x2, y2)
+            score[k] += change
+            changes[k] = change
+        self.moves += 1
+        return changes
+
+    def _stepGhost(self, agentIndex, actions):
+        ghostX, ghostY = self.posX[agentIndex], self.posY[agentIndex]
+        ghostDir, timers = self.direction[agentIndex], self.scaredTimer[agentIndex]
+        pacX, pacY = self.posX[0], self.posY[0]
+        score, status = self.score, self.status
+        changes = array('l', [0]) * self.numGames
+        for k in range(self.numGames):
+            if status[k] != RUNNING: continue
+            move = DIRECTION_IDS[actions[k]]
+            if move not in self._legalIds(agentIndex, k):
+                raise Exception("Illegal ghost action " + str(actions[k]))
+            dx, dy = VECTORS[move]
+            timer = timers[k]
+            step = 1 if timer > 0 else 2 # scared ghosts move at half speed
+            x2, y2 = ghostX[k] + step * dx, ghostY[k] + step * dy
+            if move != STOP: ghostDir[k] = move
+
+            # Time passes; ghosts snap back to the grid as they stop being scared
+            if timer == 1:
+                x2, y2 = (x2 + 1) & ~1, (y2 + 1) & ~1
+            if timer > 0: timers[k] = timer - 1
+            ghostX[k], ghostY[k] = x2, y2
+
+            change = self._collide(agentIndex, k, pacX[k], pacY[k])
+            score[k] += change
+            changes[k] = change
+        self.moves += 1
+        return changes
+
+    def _collide(self, agentIndex, k, pacX2, pacY2):
+        "GhostRules.checkDeath and collide for one ghost; returns the score change."
+        ghostX2, ghostY2 = self.posX[agentIndex][k], self.posY[agentIndex][k]
+        if abs(ghostX2 - pacX2) + abs(ghostY2 - pacY2) > 2 * COLLISION_TOLERANCE: return 0
+        timers = self.scaredTimer[agentIndex]
+        if timers[k] > 0:
+            self.posX[agentIndex][k], self.posY[agentIndex][k] = self.starts[agentIndex]
+            self.direction[agentIndex][k] = STOP
+            timers[k] = 0
+            return 200
+        if self.status[k] != WON:
+            self.status[k] = LOST
+            return -500
+        return 0
+
+def checkConformance(layoutName, numGames=20, maxMoves=400, seed=0):
+    """
+    Plays numGames random games with both the simulator and GameState, with
+    the same actions, and raises an Exception at the first difference.
+    Returns the number of agent moves compared.
+    """
+    import layout, pacman
+    board = layout.getLayout(layoutName)
+    rand = random.Random(seed)
+    sim = LockstepSimulator(board, numGames)
+    states = []
+    for k in range(numGames):
+        state = pacman.GameState()
+        state.initialize(board, 1000)
+        states.append(state)
+
+    compared = 0
+    for move in range(maxMoves):
+        if sim.numActive() == 0: break
+        agentIndex = move % sim.numAgents
+        legal = sim.getLegalActions(agentIndex)
+        actions = []
+        for k, state in enumerate(states):
+            expected = state.getLegalActions(agentIndex)
+            if sorted(legal[k]) != sorted(expected):
+                raise Exception('Game %d, move %d: legal actions %s, expected %s' % (k, move, legal[k], expected))
+            actions.append(rand.choice(expected) if expected else None)
+        sim.step(agentIndex, actions)
+        for k in range(numGames):
+            if actions[k] is None: continue
+            states[k] = state = states[k].generateSuccessor(agentIndex, actions[k])
+            for index in range(sim.numAgents):
+                agentState = state.data.agentStates[index]
+                got = (sim.getPosition(index, k), sim.getDirection(index, k), sim.scaredTimer[index][k])
+                expected = (agentState.getPosition(), agentState.getDirection(), agentState.scaredTimer)
+                if got != expected:
+                    raise Exception('Game %d, move %d: agent %d is %s, expected %s' % (k, move, index, got, expected))
+            got = (sim.getScore(k), sim.isWin(k), sim.isLose(k), sim.getNumFood(k), sorted(sim.getCapsules(k)))
+            expected = (state.getScore(), state.isWin(), state.isLose(), state.getNumFood(), sorted(state.getCapsules()))
+            if got != expected:
+                raise Exception('Game %d, move %d: (score, win, lose, food, capsules) is %s, expected %s' % (k, move, got, expected))
+            compared += 1
+    return compared
+
+if __name__ == '__main__':
+    for name in ['testClassic', 'smallClassic', 'mediumClassic', 'capsuleClassic', 'trickyClassic']:
+        print('%-16s %6d moves match the scalar rules' % (name, checkConformance(name)))